@@ -1,14 +1,21 @@
 import streamlit as st
+import streamlit.components.v1 as components
 import os
-import time
+import sys
+import threading
+from dataclasses import dataclass
+from string import Template
+from streamlit.runtime.scriptrunner import add_script_run_ctx
 
 # --- MAC SEGFAULT PROTECTION ---
-os.environ['OMP_NUM_THREADS'] = '1'
-os.environ['MKL_NUM_THREADS'] = '1'
+# Same darwin gate as run_app.py: the clamp only exists to dodge a
+# macOS segfault and would cap encode/FAISS throughput elsewhere.
 os.environ['TOKENIZERS_PARALLELISM'] = 'false'
+if sys.platform == 'darwin':
+    os.environ['OMP_NUM_THREADS'] = '1'
+    os.environ['MKL_NUM_THREADS'] = '1'
 # -------------------------------
 
-import config
 from security import (
     is_authenticated, render_login_page, logout,
     security_check, record_query, check_rate_limit
@@ -22,6 +29,37 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Module-level RAG singleton - built exactly once per process, survives
+# Streamlit cache evictions (the models behind it are hundreds of MB).
+_RAG_SINGLETON = None
+_RAG_LOCK = threading.Lock()
+
+def get_rag():
+    global _RAG_SINGLETON
+    if _RAG_SINGLETON is None:
+        with _RAG_LOCK:
+            if _RAG_SINGLETON is None:
+                try:
+                    from rag_system import BibleRAG
+                    from verifier_agent import VerifiedBibleRAG
+                    base_rag = BibleRAG(language="en")
+                    _RAG_SINGLETON = VerifiedBibleRAG(base_rag, enable_verification=True)
+                except Exception as e:
+                    st.error(f"Error loading RAG: {e}")
+                    return None
+    return _RAG_SINGLETON
+
+@st.cache_resource
+def _start_rag_preload():
+    """Kick off the model cold-load in the background once per process so it
+    overlaps with the login page instead of stalling the first query."""
+    preload_thread = threading.Thread(target=get_rag, daemon=True)
+    add_script_run_ctx(preload_thread)
+    preload_thread.start()
+    return preload_thread
+
+_start_rag_preload()
+
 # ========================================
 # AUTHENTICATION FIRST (Before any UI)
 # ========================================
@@ -32,192 +70,102 @@ if not is_authenticated():
 # ========================================
 # GLOBAL DESIGN SYSTEM (CSS)
 # ========================================
-st.markdown("""
-<style>
-    @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700;800&family=Outfit:wght@400;500;600;700;800;900&display=swap');
-
-    :root {
-        --primary: #ffffff;
-        --accent: #7c3aed;
-        --bg-main: #0b0b0b;
-        --bg-sidebar: #121212;
-        --text-primary: #ffffff;
-        --text-secondary: rgba(255, 255, 255, 0.6);
-        --card-bg: #181818;
-        --border: rgba(255, 255, 255, 0.1);
-    }
-
-    /* Deep Black Background */
-    .stApp {
-        background: var(--bg-main) !important;
-        background-image: none !important;
-    }
-
-    #MainMenu, footer, header {visibility: hidden;}
-
-    /* Typography */
-    html, body, [class*="st-"] {
-        font-family: 'Inter', sans-serif;
-        color: var(--text-primary);
-    }
-
-    h1, h2, h3, .hero-title {
-        font-family: 'Inter', sans-serif !important;
-        font-weight: 800 !important;
-        letter-spacing: -0.04em !important;
-        color: var(--text-primary) !important;
-    }
-
-    .block-container {
-        padding: 4rem 2rem !important;
-        max-width: 1100px !important;
-    }
-
-    /* Hero Section */
-    .hero-badge {
-        background: var(--card-bg);
-        color: var(--text-primary);
-        padding: 0.5rem 1rem;
-        border-radius: 8px;
-        font-size: 0.75rem;
-        font-weight: 700;
-        text-transform: uppercase;
-        letter-spacing: 0.05em;
-        border: 1px solid var(--border);
-        display: inline-block;
-        margin-bottom: 2rem;
-    }
-
-    .hero-title {
-        font-size: 5rem !important;
-        text-align: left;
-        margin-bottom: 0.5rem !important;
-        line-height: 1.0 !important;
-    }
-
-    .hero-subtitle {
-        font-size: 1.25rem;
-        color: var(--text-secondary);
-        margin-bottom: 4rem;
-        max-width: 700px;
-    }
-
-    /* Pulse Animation */
-    @keyframes pulse-green {
-        0% { transform: scale(0.95); box-shadow: 0 0 0 0 rgba(74, 222, 128, 0.7); }
-        70% { transform: scale(1); box-shadow: 0 0 0 10px rgba(74, 222, 128, 0); }
-        100% { transform: scale(0.95); box-shadow: 0 0 0 0 rgba(74, 222, 128, 0); }
-    }
-
-    .status-indicator {
-        display: inline-block;
-        width: 8px; height: 8px;
-        background: #4ade80;
-        border-radius: 50%;
-        margin-right: 8px;
-        animation: pulse-green 2s infinite;
-        vertical-align: middle;
-    }
-
-    /* Input Console */
-    div[data-testid="stTextArea"] textarea {
-        background: #1e1e1e !important;
-        border: 1px solid var(--border) !important;
-        border-radius: 12px !important;
-        color: var(--text-primary) !important;
-        padding: 1.25rem !important;
-        font-size: 1rem !important;
-        box-shadow: 0 4px 12px rgba(0,0,0,0.2) !important;
-    }
-
-    div[data-testid="stTextArea"] textarea::placeholder {
-        color: rgba(255, 255, 255, 0.6) !important;
-    }
-
-    div[data-testid="stTextArea"] textarea:focus {
-        border-color: rgba(255, 255, 255, 0.3) !important;
-    }
-
-    /* Suggestion Pills */
-    button[key*="pill_"] {
-        background: rgba(255, 255, 255, 0.05) !important;
-        color: #ffffff !important;
-        border: 1px solid rgba(255, 255, 255, 0.1) !important;
-        border-radius: 100px !important;
-        padding: 0.4rem 1.25rem !important;
-        font-size: 0.85rem !important;
-        width: auto !important;
-        min-width: 100px !important;
-    }
-
-    /* Answer Card */
-    .answer-card {
-        background: #121212;
-        border: 1px solid var(--border);
-        border-radius: 12px;
-        padding: 2rem;
-        margin-top: 4rem;
-    }
-
-    .metric-badge {
-        background: rgba(255, 255, 255, 0.05);
-        color: rgba(255, 255, 255, 0.8);
-        border: 1px solid var(--border);
-        border-radius: 8px;
-        padding: 0.4rem 0.8rem;
-        font-size: 0.75rem;
-        font-weight: 600;
-    }
-
-    /* Global Button Contrast fix */
-    .stButton > button {
-        background: #ffffff !important;
-        color: #000000 !important;
-        border: none !important;
-        border-radius: 8px !important;
-        font-weight: 700 !important;
-    }
-
-    .stButton > button * {
-        color: #000000 !important;
-    }
-
-    /* Sidebar */
-    section[data-testid="stSidebar"] {
-        background-color: var(--bg-sidebar) !important;
-        border-right: 1px solid var(--border) !important;
-    }
-</style>
-""", unsafe_allow_html=True)
+# Fonts load via preconnect + a swap-enabled stylesheet link rather than a
+# render-blocking @import inside the CSS, so first paint uses the fallback
+# font instead of waiting 2-3 network RTTs.
+_FONT_LINKS = (
+    '<link rel="preconnect" href="https://fonts.googleapis.com">'
+    '<link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>'
+    '<link rel="stylesheet" href="https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700;800&family=Outfit:wght@400;500;600;700;800;900&display=swap">'
+)
+
+@st.cache_data(max_entries=1)
+def _load_css() -> str:
+    """Read the app stylesheet once; cached so reruns pay a dict lookup."""
+    css_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "app.css")
+    with open(css_path, "r", encoding="utf-8") as f:
+        return f"{_FONT_LINKS}<style>{f.read()}</style>"
+
+st.markdown(_load_css(), unsafe_allow_html=True)
+
+# Fixed-layout answer record: slots avoid a per-instance __dict__ and make
+# attribute access a single slot load.
+@dataclass(frozen=True, slots=True)
+class AnswerCard:
+    q: str
+    a: str
+    s: tuple
+    v: dict
 
 # Session state
-if 'rag' not in st.session_state: st.session_state.rag = None
-if 'verified_rag' not in st.session_state: st.session_state.verified_rag = None
 if 'answer' not in st.session_state: st.session_state.answer = None
 
+# Load RAG
+verified_rag = get_rag()
+
+# Suggestion pills - fixed queries, so their answers are deterministic for a
+# given index. Precompute them once and persist to disk; a pill click then
+# becomes a cache hit instead of a full embed+FAISS+LLM roundtrip.
+PILL_QUERIES = [("Who is Job?", "job"), ("Abraham's life", "abraham"), ("The Law", "law"), ("Meaning of Love", "love")]
+
 @st.cache_resource
-def get_rag():
-    try:
-        from rag_system import BibleRAG
-        return BibleRAG(language="en")
-    except Exception as e:
-        st.error(f"Error loading RAG: {e}")
-        return None
+def _pill_vectors():
+    """Encode all pill prompts in one SentenceTransformer batch at warm-up."""
+    rag = get_rag()
+    if rag is None:
+        return {}
+    texts = [text for text, _ in PILL_QUERIES]
+    vectors = rag.rag.vector_store.embedding_model.encode(texts, batch_size=8, convert_to_numpy=True)
+    return dict(zip(texts, vectors))
+
+@st.cache_data(persist="disk", show_spinner=False)
+def _canned_answer(question: str):
+    return get_rag().query(question, query_embedding=_pill_vectors().get(question))
+
+# Disk-backed answer cache keyed by the sanitized question. A repeated
+# question (same user or another) collapses the whole embed+FAISS+LLM+
+# verifier stack into a cache read. On a miss the answer streams
+# token-by-token while it generates; on a hit Streamlit replays the
+# final text instantly.
+@st.cache_data(persist="disk", max_entries=10000, show_spinner=False)
+def _cached_query(question: str):
+    rag = get_rag()
+    stream = rag.stream_query(question)
+    result = None
+
+    # Capture the generator's return value locally while relaying deltas
+    # to write_stream: concurrent sessions share the RAG singleton, so
+    # the final result must never round-trip through instance state.
+    def _relay():
+        nonlocal result
+        while True:
+            try:
+                delta = next(stream)
+            except StopIteration as stop:
+                result = stop.value
+                return
+            yield delta
+
+    st.write_stream(_relay())
+    return result
+
+def _warm_pill_answers():
+    for text, _ in PILL_QUERIES:
+        try:
+            _canned_answer(text)
+        except Exception:
+            pass
 
 @st.cache_resource
-def get_verified_rag(_base_rag):
-    try:
-        from verifier_agent import VerifiedBibleRAG
-        return VerifiedBibleRAG(_base_rag, enable_verification=True)
-    except Exception as e:
-        st.error(f"Error loading verifier: {e}")
-        return None
+def _start_pill_warmup():
+    """Warm the canned answers once per process in a background thread."""
+    warm_thread = threading.Thread(target=_warm_pill_answers, daemon=True)
+    add_script_run_ctx(warm_thread)
+    warm_thread.start()
+    return warm_thread
 
-# Load RAG
-if st.session_state.rag is None:
-    st.session_state.rag = get_rag()
-    if st.session_state.rag:
-        st.session_state.verified_rag = get_verified_rag(st.session_state.rag)
+if verified_rag:
+    _start_pill_warmup()
 
 # Sidebar
 with st.sidebar:
@@ -269,7 +217,7 @@ st.markdown('''
 ''', unsafe_allow_html=True)
 
 # Main Input
-if st.session_state.rag:
+if verified_rag:
     col1, col2 = st.columns([12, 1])
     with col1:
         question = st.text_area("prompt", placeholder="Send a message... (Enter to search, Shift+Enter for new line)", height=120, label_visibility="collapsed", key="bible_prompt")
@@ -277,78 +225,116 @@ if st.session_state.rag:
         st.markdown("<div style='height: 60px'></div>", unsafe_allow_html=True)
         search = st.button("⮕", key="search_btn")
     
-    # Enter-to-Submit JS
-    import streamlit.components.v1 as components
-    components.html("""
-        <script>
-        function setup() {
-            const doc = window.parent.document;
-            const textarea = doc.querySelector('textarea[aria-label="prompt"]');
-            const searchBtn = Array.from(doc.querySelectorAll('button')).find(btn => btn.innerText.includes('⮕'));
-            
-            if (textarea && searchBtn && !textarea.dataset.listenerAdded) {
-                textarea.addEventListener('keydown', function(e) {
-                    if (e.key === 'Enter' && !e.shiftKey) {
-                        e.preventDefault();
-                        textarea.blur();
-                        setTimeout(() => { searchBtn.click(); }, 150);
+    # Enter-to-Submit JS - injected once per session. The hook lives on the
+    # parent window (it survives the iframe being dropped on later reruns)
+    # and uses a MutationObserver instead of a 1Hz polling loop, re-binding
+    # only when Streamlit actually swaps the textarea node.
+    if not st.session_state.get('_enter_hook_injected'):
+        st.session_state._enter_hook_injected = True
+        components.html("""
+            <script>
+            const win = window.parent;
+            if (!win.__enterHookInstalled) {
+                win.__enterHookInstalled = true;
+                const doc = win.document;
+                function bind() {
+                    const textarea = doc.querySelector('textarea[aria-label="prompt"]');
+                    const searchBtn = Array.from(doc.querySelectorAll('button')).find(btn => btn.innerText.includes('⮕'));
+
+                    if (textarea && searchBtn && !textarea.dataset.listenerAdded) {
+                        textarea.addEventListener('keydown', function(e) {
+                            if (e.key === 'Enter' && !e.shiftKey) {
+                                e.preventDefault();
+                                textarea.blur();
+                                setTimeout(() => { searchBtn.click(); }, 150);
+                            }
+                        });
+                        textarea.dataset.listenerAdded = 'true';
                     }
-                });
-                textarea.dataset.listenerAdded = 'true';
+                }
+                bind();
+                new MutationObserver(bind).observe(doc.body, {childList: true, subtree: true});
             }
-        }
-        setInterval(setup, 1000);
-        </script>
-        """, height=0)
+            </script>
+            """, height=0)
 
     if search and question:
         is_allowed, query, err = security_check(question)
         if not is_allowed: st.error(f"⚠️ {err}")
         else:
-            with st.spinner(""):
-                res = st.session_state.verified_rag.query(query) if st.session_state.verified_rag else st.session_state.rag.query(query)
-                st.session_state.answer = {"q": query, "a": res["answer"], "s": res["sources"], "v": res.get("verification", {})}
-                record_query()
-                st.rerun()
+            res = _cached_query(query)
+            st.session_state.answer = AnswerCard(q=query, a=res["answer"], s=tuple(res["sources"]), v=res.get("verification", {}))
+            st.session_state.answer_html = None
+            record_query()
 
 # Pills
-if st.session_state.rag:
+if verified_rag:
     st.markdown('<div class="pills-container" style="margin-top:1rem; display:flex; gap:0.75rem; flex-wrap:wrap;">', unsafe_allow_html=True)
-    for text, key in [("Who is Job?", "job"), ("Abraham's life", "abraham"), ("The Law", "law"), ("Meaning of Love", "love")]:
+    for text, key in PILL_QUERIES:
         if st.button(text, key=f"pill_{key}"):
             with st.spinner(""):
-                res = st.session_state.verified_rag.query(text) if st.session_state.verified_rag else st.session_state.rag.query(text)
-                st.session_state.answer = {"q": text, "a": res["answer"], "s": res["sources"], "v": res.get("verification", {})}
-                record_query(); st.rerun()
+                res = _canned_answer(text)
+                st.session_state.answer = AnswerCard(q=text, a=res["answer"], s=tuple(res["sources"]), v=res.get("verification", {}))
+                st.session_state.answer_html = None
+                record_query()
     st.markdown('</div>', unsafe_allow_html=True)
 
-# Answer Display
-if st.session_state.answer:
-    ans = st.session_state.answer
-    v = ans.get("v", {})
-    rate = v.get("grounding_rate", 0.0)
-    
-    if v.get("rejected") or rate < 0.5: icon, status, color = "⚠️", "Verification Failed", "#ef4444"
-    elif rate < 0.8: icon, status, color = "◑", "Partial Verification", "#fbbf24"
-    else: icon, status, color = "🛡️", "Highly Verified", "#4ade80"
-    
-    sources_html = "".join([f'<span style="background:rgba(255,255,255,0.05); color:rgba(255,255,255,0.6); border:1px solid rgba(255,255,255,0.1); border-radius:8px; padding:0.4rem 0.8rem; font-size:0.75rem; margin-right:0.5rem;">📖 {s}</span>' for s in ans["s"][:6]])
-    
-    st.markdown(f'''
+# Answer card templates - compiled once; the card HTML itself is built once
+# per answer and cached in session state, so reruns re-emit a stored string
+# instead of re-interpolating a multi-line f-string.
+# Escape user/LLM-derived fields before interpolating into the
+# unsafe_allow_html card. str.translate with a prebuilt table is a single
+# C-level pass over the string.
+_HTML_ESCAPE_TABLE = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#39;"})
+
+_SOURCE_SPAN = '<span style="background:rgba(255,255,255,0.05); color:rgba(255,255,255,0.6); border:1px solid rgba(255,255,255,0.1); border-radius:8px; padding:0.4rem 0.8rem; font-size:0.75rem; margin-right:0.5rem;">📖 %s</span>'
+
+_ANSWER_CARD = Template('''
 <div class="answer-card">
     <div style="color:rgba(255,255,255,0.5); font-size:0.85rem; text-transform:uppercase; font-weight:700; margin-bottom:1rem;">Research Query</div>
-    <div style="font-size:1.25rem; font-weight:700; color:#fff; margin-bottom:2rem;">{ans["q"]}</div>
+    <div style="font-size:1.25rem; font-weight:700; color:#fff; margin-bottom:2rem;">$question</div>
     <div style="display:flex; gap:1rem; margin-bottom:2.5rem;">
-        <div class="metric-badge" style="color:{color};">{icon} {status}</div>
-        <div class="metric-badge">Accuracy: {rate*100:.0f}%</div>
+        <div class="metric-badge" style="color:$color;">$icon $status</div>
+        <div class="metric-badge">Accuracy: $accuracy%</div>
     </div>
-    <div style="font-size:1.1rem; line-height:1.8; color:#fff; border-left:2px solid #333; padding-left:1.5rem; margin-bottom:3rem;">{ans["a"]}</div>
+    <div style="font-size:1.1rem; line-height:1.8; color:#fff; border-left:2px solid #333; padding-left:1.5rem; margin-bottom:3rem;">$answer</div>
     <div style="background:rgba(255,255,255,0.02); border-radius:8px; padding:1.5rem; border:1px solid rgba(255,255,255,0.1);">
         <div style="color:rgba(255,255,255,0.3); font-size:0.7rem; text-transform:uppercase; font-weight:800; margin-bottom:1rem;">Vector Grounding Sources</div>
-        {sources_html}
+        $sources
     </div>
 </div>
-''', unsafe_allow_html=True)
+''')
+
+def _build_answer_html(ans: AnswerCard) -> str:
+    rate = ans.v.get("grounding_rate", 0.0)
+
+    if ans.v.get("rejected") or rate < 0.5: icon, status, color = "⚠️", "Verification Failed", "#ef4444"
+    elif rate < 0.8: icon, status, color = "◑", "Partial Verification", "#fbbf24"
+    else: icon, status, color = "🛡️", "Highly Verified", "#4ade80"
+
+    sources_html = "".join(_SOURCE_SPAN % s.translate(_HTML_ESCAPE_TABLE) for s in ans.s[:6])
+
+    return _ANSWER_CARD.substitute(
+        question=ans.q.translate(_HTML_ESCAPE_TABLE),
+        color=color,
+        icon=icon,
+        status=status,
+        accuracy=f"{rate*100:.0f}",
+        answer=ans.a.translate(_HTML_ESCAPE_TABLE),
+        sources=sources_html
+    )
+
+# Answer Display - fragment-scoped so answer updates rerun only this block,
+# not the whole script (CSS, sidebar, hero, pills).
+@st.fragment
+def _render_answer():
+    if not st.session_state.answer:
+        return
+    if st.session_state.get('answer_html') is None:
+        st.session_state.answer_html = _build_answer_html(st.session_state.answer)
+    st.markdown(st.session_state.answer_html, unsafe_allow_html=True)
+
+_render_answer()
 
 # Footer
 st.markdown('<div style="height:100px;"></div><div style="border-top:1px solid rgba(255,255,255,0.05); padding:2rem 0; color:rgba(255,255,255,0.2); font-size:0.75rem; display:flex; justify-content:space-between;"><div>© 2026 Bible RAG Console • Grounded in Truth</div><div>🛡️ Zero-Hallucination | ✓ Agent Verified</div></div>', unsafe_allow_html=True)
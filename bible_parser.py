@@ -1,10 +1,82 @@
 """
 Parse Bible text files into structured format for RAG.
 """
-import re
+try:
+    # The third-party regex module is API-compatible and has a faster
+    # matcher (literal prefiltering, better anchoring), which helps the
+    # full-text finditer pass below. Fall back to stdlib re when absent.
+    import regex as re
+except ImportError:
+    import re
 import os
+import mmap
+from collections import deque
+from itertools import groupby
+from operator import itemgetter
 from typing import List, Dict
 
+# Single master pattern: one C-level finditer pass over the whole text
+# replaces the per-line split/strip/three-regex dispatch. The alternatives
+# are, in priority order: eBible "Book Chapter:Verse Text" lines, bare
+# "Chapter:Verse Text" lines, and a catch-all for every other non-blank
+# line (book headers, Gutenberg front matter, verse continuations).
+# [^\S\n] is horizontal whitespace, so alternatives never cross lines.
+# Compiled as a bytes pattern so it can scan a memory-mapped file in
+# place; only the captured groups are decoded.
+MASTER_RE = re.compile(
+    rb'^[^\S\n]*(?:'
+    rb'(?P<eb_book>[A-Z][A-Za-z ]{1,30}?)[^\S\n]+(?P<eb_ch>\d+):(?P<eb_v>\d+)[^\S\n]+(?P<eb_txt>.+)'
+    rb'|(?P<v_ch>\d+):(?P<v_v>\d+)[^\S\n]+(?P<v_txt>.+)'
+    rb'|(?P<other>\S.*)'
+    rb')$',
+    re.MULTILINE)
+
+# Comprehensive list of Bible books for validation, hoisted to module
+# scope so it is built once rather than per parse. All canonical names
+# are single words, so detection can use hash lookups instead of ~60
+# Python-level substring scans per candidate line.
+COMMON_BOOKS = (
+    'Genesis', 'Exodus', 'Leviticus', 'Numbers', 'Deuteronomy',
+    'Joshua', 'Judges', 'Ruth', 'Samuel', 'Kings', 'Chronicles',
+    'Ezra', 'Nehemiah', 'Esther', 'Job', 'Psalms', 'Proverbs',
+    'Ecclesiastes', 'Song', 'Isaiah', 'Jeremiah', 'Lamentations',
+    'Ezekiel', 'Daniel', 'Hosea', 'Joel', 'Amos', 'Obadiah',
+    'Jonah', 'Micah', 'Nahum', 'Habakkuk', 'Zephaniah', 'Haggai',
+    'Zechariah', 'Malachi', 'Matthew', 'Mark', 'Luke', 'John',
+    'Acts', 'Romans', 'Corinthians', 'Galatians', 'Ephesians',
+    'Philippians', 'Colossians', 'Thessalonians', 'Timothy',
+    'Titus', 'Philemon', 'Hebrews', 'James', 'Peter', 'Jude', 'Revelation'
+)
+_BOOK_SET = frozenset(COMMON_BOOKS)
+# Single hash lookup beats a str.isdigit method dispatch in the ~30k-
+# iteration continuation check.
+_DIGITS = frozenset('0123456789')
+_BOOK_BY_LOWER = {b.lower(): b for b in COMMON_BOOKS}
+# Headers like "The First Book of Moses: Called Genesis"
+_CALLED_BOOK_RE = re.compile(r'Called ([A-Za-z]+)')
+# Header titles that don't end in (or name) their book - mapped
+# explicitly so Lamentations isn't filed under Jeremiah, etc.
+_TITLE_BOOKS = {
+    'the song of solomon': 'Song',
+    'the lamentations of jeremiah': 'Lamentations',
+    'the acts of the apostles': 'Acts',
+    'the revelation of saint john the divine': 'Revelation',
+}
+
+# Gutenberg front-matter / license markers, fused into one alternation so
+# each candidate line is scanned once instead of once per needle.
+_GUTENBERG_MARKERS_RE = re.compile(
+    r'Project Gutenberg|EBook|License|King James Version|Old Testament|New Testament'
+)
+
+# Fallback-parser patterns: stream sentences straight off the text with
+# finditer instead of materializing a re.split list of the whole file.
+# Pattern: Book Chapter:Verse or (Book Chapter:Verse)
+# re.ASCII keeps \s/\d on the 128-entry ASCII tables instead of the full
+# Unicode property tables; the sources are ASCII.
+_SENTENCE_RE = re.compile(r'[^.!?]+', re.DOTALL)
+_VERSE_REF_RE = re.compile(r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)\s+(\d+):(\d+)', re.ASCII)
+
 class BibleParser:
     def __init__(self, language: str = "en"):
         self.language = language
@@ -18,118 +90,152 @@ class BibleParser:
         if not os.path.exists(filepath):
             raise FileNotFoundError(f"Bible file not found: {filepath}")
         
-        with open(filepath, 'r', encoding='utf-8') as f:
-            text = f.read()
-        
         verses = []
-        lines = text.split('\n')
-        
-        # Pattern 1: "Book Chapter:Verse Text" (eBible format)
-        ebible_pattern = re.compile(r'^([A-Z][A-Za-z\s]+?)\s+(\d+):(\d+)\s+(.+)$')
-        
-        # Pattern 2: "Chapter:Verse Text" (with book context)
-        verse_pattern = re.compile(r'^(\d+):(\d+)\s+(.+)$')
-        
-        # Pattern 3: Book name on its own line (Mixed case or Caps)
-        book_pattern = re.compile(r'^([A-Za-z0-9\s:]+)$')
-        
-        # Comprehensive list of Bible books for validation
-        common_books = [
-            'Genesis', 'Exodus', 'Leviticus', 'Numbers', 'Deuteronomy',
-            'Joshua', 'Judges', 'Ruth', 'Samuel', 'Kings', 'Chronicles',
-            'Ezra', 'Nehemiah', 'Esther', 'Job', 'Psalms', 'Proverbs',
-            'Ecclesiastes', 'Song', 'Isaiah', 'Jeremiah', 'Lamentations',
-            'Ezekiel', 'Daniel', 'Hosea', 'Joel', 'Amos', 'Obadiah',
-            'Jonah', 'Micah', 'Nahum', 'Habakkuk', 'Zephaniah', 'Haggai',
-            'Zechariah', 'Malachi', 'Matthew', 'Mark', 'Luke', 'John',
-            'Acts', 'Romans', 'Corinthians', 'Galatians', 'Ephesians',
-            'Philippians', 'Colossians', 'Thessalonians', 'Timothy',
-            'Titus', 'Philemon', 'Hebrews', 'James', 'Peter', 'Jude', 'Revelation'
-        ]
-        
+
         current_book = None
         current_chapter = None
-        
-        for line_num, line in enumerate(lines, 1):
-            line = line.strip()
-            if not line:
-                continue
-            
-            # Skip Gutenberg headers/license lines that might look like books
-            if any(x in line for x in ['Project Gutenberg', 'EBook', 'License', 'King James Version', 'Old Testament', 'New Testament']):
-                if "Bible" not in line or ":" in line:
-                    pass
-                else:
+        alt_text = None
+        saw_ebible_format = False
+        skip_alt_title = False
+        prev_end = 0
+
+        # Memory-map the file and let the master regex scan the mapped
+        # bytes in place: no whole-file read into a Python string and no
+        # per-line list. Only matched groups are decoded.
+        with open(filepath, 'rb') as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for m in MASTER_RE.finditer(mm):
+                kind = m.lastgroup
+                # Genuine book headers stand in their own paragraph, so a
+                # candidate only counts when a blank line precedes it (two
+                # newlines in the gap since the previous matched line).
+                # Wrapped verse lines always follow their verse directly,
+                # which keeps lines that merely end in a book name (e.g.
+                # '...the LORD called Samuel') from flipping attribution.
+                blank_preceded = prev_end == 0 or mm[prev_end:m.start()].count(b'\n') >= 2
+                prev_end = m.end()
+
+                # eBible format: "Book Chapter:Verse Text"
+                if kind == 'eb_txt':
+                    book_candidate = m.group('eb_book').decode('utf-8').strip().title()
+                    # Only accept the book label when the file has already
+                    # shown itself to be eBible-formatted or the name is a
+                    # real book. A wrapped KJV line like 'Choose thee
+                    # 21:12 Either three years...' fits the shape but is
+                    # verse continuation, handled below.
+                    if (saw_ebible_format
+                            or book_candidate.lower() in _BOOK_BY_LOWER
+                            or book_candidate.rsplit(None, 1)[-1] in _BOOK_SET):
+                        saw_ebible_format = True
+                        chapter = m.group('eb_ch').decode('utf-8')
+                        verse = m.group('eb_v').decode('utf-8')
+                        current_book = book_candidate
+                        current_chapter = int(chapter)
+                        verses.append({
+                            'book': current_book,
+                            'chapter': current_chapter,
+                            'verse': int(verse),
+                            'text': [m.group('eb_txt').decode('utf-8').strip()],
+                            'reference': f"{current_book} {chapter}:{verse}"
+                        })
+                        continue
+
+                # Simple verse format: "Chapter:Verse Text"
+                if kind == 'v_txt':
+                    chapter = m.group('v_ch').decode('utf-8')
+                    verse = m.group('v_v').decode('utf-8')
+                    current_chapter = int(chapter)
+                    if current_book:
+                        verses.append({
+                            'book': current_book,
+                            'chapter': current_chapter,
+                            'verse': int(verse),
+                            'text': [m.group('v_txt').decode('utf-8').strip()],
+                            'reference': f"{current_book} {chapter}:{verse}"
+                        })
+                    else:
+                        # Create verse without book name (will be set later)
+                        verses.append({
+                            'book': 'Unknown',
+                            'chapter': current_chapter,
+                            'verse': int(verse),
+                            'text': [m.group('v_txt').decode('utf-8').strip()],
+                            'reference': f"Unknown {chapter}:{verse}"
+                        })
                     continue
 
-            # Try eBible format first: "Book Chapter:Verse Text"
-            ebible_match = ebible_pattern.match(line)
-            if ebible_match:
-                book, chapter, verse, content = ebible_match.groups()
-                current_book = book.strip().title()
-                current_chapter = int(chapter)
-                verses.append({
-                    'book': current_book,
-                    'chapter': current_chapter,
-                    'verse': int(verse),
-                    'text': content.strip(),
-                    'reference': f"{current_book} {chapter}:{verse}"
-                })
-                continue
-            
-            # Try book name detection
-            # Check if this line is EXACTLY a book name or contains one as its primary identity
-            potential_book = line.strip()
-            found_book = None
-            
-            # Check for exact matches first
-            for book in common_books:
-                if potential_book.lower() == book.lower():
-                    found_book = book
-                    break
-                # Handle "The Book of..." or "The First Book of... Called Genesis"
-                if "Called " + book in potential_book or potential_book.endswith(" " + book):
-                    found_book = book
-                    break
-            
-            if found_book:
-                current_book = found_book
-                continue
-            
-            # Try simple verse pattern: "Chapter:Verse Text"
-            verse_match = verse_pattern.match(line)
-            if verse_match:
-                chapter, verse, content = verse_match.groups()
-                current_chapter = int(chapter)
-                if current_book:
-                    verses.append({
-                        'book': current_book,
-                        'chapter': current_chapter,
-                        'verse': int(verse),
-                        'text': content.strip(),
-                        'reference': f"{current_book} {chapter}:{verse}"
-                    })
-                else:
-                    # Create verse without book name (will be set later)
-                    verses.append({
-                        'book': 'Unknown',
-                        'chapter': current_chapter,
-                        'verse': int(verse),
-                        'text': content.strip(),
-                        'reference': f"Unknown {chapter}:{verse}"
-                    })
-                continue
-            
-            # Continuation of previous verse (if we have context)
-            if verses and current_book:
-                # Append to last verse if it's clearly continuation text
-                if len(line) > 10 and not line[0].isdigit():
-                    verses[-1]['text'] += ' ' + line
-        
+                # Everything else: headers, book names, or verse
+                # continuations. Rejected eBible-shaped lines arrive here
+                # with no 'other' group - take the whole match.
+                raw = m.group('other')
+                line = (raw if raw is not None else m.group(0)).decode('utf-8').strip()
+
+                # Skip Gutenberg headers/license lines that might look like books
+                if _GUTENBERG_MARKERS_RE.search(line):
+                    if "Bible" not in line or ":" in line:
+                        pass
+                    else:
+                        continue
+
+                # "Otherwise Called:" / "Commonly Called:" subtitle lines
+                # introduce an alternate title for the book just announced
+                # (e.g. Samuel 'Otherwise Called: The First Book of the
+                # Kings') - the title line that follows must not change
+                # the attribution.
+                if blank_preceded:
+                    if line.endswith('Called:'):
+                        skip_alt_title = True
+                        continue
+                    if skip_alt_title:
+                        skip_alt_title = False
+                        continue
+
+                    # Try book name detection (headers only - see the
+                    # blank_preceded note above).
+                    # Check for exact matches first, then "The First Book
+                    # of... Called Genesis" headers, then titles ending in
+                    # a book name. Each check is a single hash lookup.
+                    potential_book = line
+                    found_book = _BOOK_BY_LOWER.get(potential_book.lower())
+                    if found_book is None:
+                        found_book = _TITLE_BOOKS.get(potential_book.lower())
+                    if found_book is None:
+                        called = _CALLED_BOOK_RE.search(potential_book)
+                        if called and called.group(1) in _BOOK_SET:
+                            found_book = called.group(1)
+                    if found_book is None and potential_book:
+                        last_word = potential_book.rsplit(None, 1)[-1]
+                        if last_word in _BOOK_SET:
+                            found_book = last_word
+
+                    if found_book:
+                        current_book = found_book
+                        continue
+
+                # Continuation of previous verse (if we have context)
+                if verses and current_book:
+                    # Append to last verse if it's clearly continuation text
+                    if len(line) > 10 and line[0] not in _DIGITS:
+                        verses[-1]['text'].append(line)
+
+            # Only materialize the full text if the fallback parser will
+            # need it; the mapping is gone once the with block exits.
+            # Once the input has identified itself as eBible-formatted,
+            # a sparse result is real, not a format mismatch - skip the
+            # full-text fallback reparse.
+            if not saw_ebible_format and len(verses) < 100:
+                alt_text = mm[:].decode('utf-8', errors='replace')
+
+        # Verse text accumulates as a list of fragments while parsing
+        # (continuation lines are frequent); join each one exactly once here
+        # instead of paying quadratic string concatenation in the loop.
+        for v in verses:
+            v['text'] = ' '.join(v['text'])
+
         # If we still don't have enough verses, try alternative parsing
-        if len(verses) < 100:
+        if alt_text is not None:
             print(f"Warning: Only found {len(verses)} verses. Trying alternative parsing...")
-            alt_verses = self._parse_alternative_format(text)
+            alt_verses = self._parse_alternative_format(alt_text)
             if len(alt_verses) > len(verses):
                 verses = alt_verses
         
@@ -142,33 +248,28 @@ class BibleParser:
     def _parse_alternative_format(self, text: str) -> List[Dict]:
         """Alternative parsing for different Bible text formats."""
         verses = []
-        
-        # Try to find verse references in text
-        # Pattern: Book Chapter:Verse or (Book Chapter:Verse)
-        verse_ref_pattern = re.compile(r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)\s+(\d+):(\d+)')
-        
-        sentences = re.split(r'[.!?]+', text)
-        
-        for sentence in sentences:
-            sentence = sentence.strip()
+
+        for sentence_match in _SENTENCE_RE.finditer(text):
+            sentence = sentence_match.group().strip()
             if not sentence:
                 continue
-            
-            matches = verse_ref_pattern.findall(sentence)
-            if matches:
-                for match in matches:
-                    book, chapter, verse = match
-                    # Extract text after reference
-                    text_part = sentence.split(f"{book} {chapter}:{verse}")[-1].strip()
-                    if text_part:
-                        verses.append({
-                            'book': book,
-                            'chapter': int(chapter),
-                            'verse': int(verse),
-                            'text': text_part,
-                            'reference': f"{book} {chapter}:{verse}"
-                        })
-            else:
+
+            found_reference = False
+            for m in _VERSE_REF_RE.finditer(sentence):
+                found_reference = True
+                book, chapter, verse = m.groups()
+                # The engine already knows where the reference ends, so
+                # slice from m.end() instead of re-scanning the sentence.
+                text_part = sentence[m.end():].strip()
+                if text_part:
+                    verses.append({
+                        'book': book,
+                        'chapter': int(chapter),
+                        'verse': int(verse),
+                        'text': text_part,
+                        'reference': f"{book} {chapter}:{verse}"
+                    })
+            if not found_reference:
                 # If no reference found, create a general entry
                 if len(sentence) > 20:  # Only include substantial sentences
                     verses.append({
@@ -202,80 +303,69 @@ class BibleParser:
     def create_chunks(self, verses: List[Dict], chunk_size: int = 500, overlap: int = 50) -> List[Dict]:
         """
         Create overlapping chunks from verses for embedding.
+        Overlap is measured in words carried over between chunks; it does
+        not cross book/chapter boundaries, so every chunk's text belongs
+        to the book and chapter it is labelled with.
         """
         chunks = []
-        
-        # Group verses by book and chapter
-        current_book = None
-        current_chapter = None
-        current_text = []
+
+        # Verses arrive in canonical order, so grouping by (book, chapter)
+        # yields natural chapter segments and the inner loop only has to
+        # split by size - no per-verse change-detection branches.
+        for (book, chapter), segment in groupby(verses, key=itemgetter('book', 'chapter')):
+            self._chunk_segment(segment, book, chapter, chunk_size, overlap, chunks)
+
+        return chunks
+
+    def _chunk_segment(self, segment, book, chapter, chunk_size, overlap, chunks):
+        """Size-split one chapter's verses into overlapping word chunks."""
+        # Accumulate words directly - words are the unit overlap operates
+        # on - with a running length of ' '.join(current_words) so size
+        # checks are O(1) instead of a full join per verse.
+        current_words = deque()
         current_references = []
-        
-        for verse in verses:
-            book = verse['book']
-            chapter = verse['chapter']
-            verse_text = verse['text']
-            reference = verse['reference']
-            
-            # If new book/chapter or chunk too large, save current chunk
-            if (current_book and current_book != book) or \
-               (current_chapter and current_chapter != chapter) or \
-               (len(' '.join(current_text)) > chunk_size):
-                
-                if current_text:
-                    chunk_text = ' '.join(current_text)
-                    chunks.append({
-                        'text': chunk_text,
-                        'references': list(set(current_references)),
-                        'book': current_book,
-                        'chapter': current_chapter,
-                        'language': self.language
-                    })
-                
-                # Start new chunk with overlap
-                if overlap > 0 and current_text:
-                    overlap_words = ' '.join(current_text[-overlap:]).split()
-                    current_text = overlap_words
-                    current_references = current_references[-overlap:]
-                else:
-                    current_text = []
-                    current_references = []
-            
-            current_book = book
-            current_chapter = chapter
-            current_text.append(verse_text)
-            current_references.append(reference)
-            
-            # Create chunk if size reached
-            if len(' '.join(current_text)) >= chunk_size:
-                chunk_text = ' '.join(current_text)
-                chunks.append({
-                    'text': chunk_text,
-                    'references': list(set(current_references)),
-                    'book': current_book,
-                    'chapter': current_chapter,
-                    'language': self.language
-                })
-                
-                # Keep overlap for next chunk
-                if overlap > 0:
-                    overlap_words = ' '.join(current_text[-overlap:]).split()
-                    current_text = overlap_words
-                    current_references = current_references[-overlap:]
-                else:
-                    current_text = []
-                    current_references = []
-        
-        # Add remaining text as final chunk
-        if current_text:
-            chunk_text = ' '.join(current_text)
+        current_len = 0
+
+        # Rolling windows of the last `overlap` words/references, trimmed
+        # automatically by maxlen as the segment streams through - no
+        # full-chunk list() + slice at every emit.
+        overlap_words = deque(maxlen=overlap) if overlap > 0 else None
+        overlap_refs = deque(maxlen=overlap) if overlap > 0 else None
+
+        def emit_chunk():
             chunks.append({
-                'text': chunk_text,
-                'references': list(set(current_references)),
-                'book': current_book,
-                'chapter': current_chapter,
+                'text': ' '.join(current_words),
+                # dict.fromkeys dedupes in one pass and keeps canonical
+                # verse order, unlike the old list(set(...)).
+                'references': list(dict.fromkeys(current_references)),
+                'book': book,
+                'chapter': chapter,
                 'language': self.language
             })
-        
-        return chunks
+
+        def keep_overlap():
+            if overlap <= 0:
+                return deque(), [], 0
+            carried = deque(overlap_words)
+            length = sum(map(len, carried)) + len(carried) - 1
+            return carried, list(overlap_refs), max(length, 0)
+
+        for verse in segment:
+            words = verse['text'].split()
+            added = sum(map(len, words)) + len(words)
+            current_len = current_len + added if current_words else added - 1
+            current_words.extend(words)
+            current_references.append(verse['reference'])
+            if overlap > 0:
+                overlap_words.extend(words)
+                overlap_refs.append(verse['reference'])
+
+            # Create chunk if size reached
+            if current_len >= chunk_size:
+                emit_chunk()
+                current_words, current_references, current_len = keep_overlap()
+
+        # Add remaining text as final chunk
+        if current_words:
+            emit_chunk()
 
@@ -13,6 +13,8 @@ TEMPERATURE = 0.1  # Low temperature for consistency
 
 # Vector Store Configuration
 VECTOR_STORE_PATH = "vector_stores"
+USE_GPU_FAISS = os.getenv("USE_GPU_FAISS", "false").lower() in ("1", "true", "yes")  # GPU retrieval when CUDA is available
+FAISS_NPROBE = int(os.getenv("FAISS_NPROBE", "32"))  # IVF lists probed per search (recall/latency knob)
 FAISS_INDEX_EN = "faiss_index_en"
 FAISS_INDEX_TA = "faiss_index_ta"
 
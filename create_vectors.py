@@ -4,10 +4,6 @@ Simple vector store creation script
 import os
 import sys
 
-# Set environment to avoid memory issues
-os.environ['OMP_NUM_THREADS'] = '1'
-os.environ['MKL_NUM_THREADS'] = '1'
-
 import config
 from bible_parser import BibleParser
 from vector_store import BibleVectorStore
@@ -33,8 +29,11 @@ def main():
     # Create vector store
     print('Creating embeddings and vector store...')
     print('This will take a few minutes...')
+    # Memory is bounded by the encode batch size, not by capping BLAS
+    # threads: OMP_NUM_THREADS=1 used to serialize the MiniLM matmuls
+    # that dominate this script's runtime.
     vector_store = BibleVectorStore(language='en')
-    vector_store.create_index(chunks)
+    vector_store.create_index(chunks, batch_size=64)
     print('Vector store created successfully!')
 
 if __name__ == '__main__':
@@ -5,7 +5,39 @@ import os
 import requests
 from bs4 import BeautifulSoup
 import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from tqdm import tqdm
+
+# Verse lines like "1:1 In the beginning...". Compiled once; fullmatch on
+# the stripped line replaces the ^...$ anchors, and re.ASCII keeps \d/\s
+# on the ASCII fast path.
+_VERSE_LINE_RE = re.compile(r'(\d+):(\d+)\s+(.+)', re.ASCII)
+
+# Cap on concurrent bible-api.com requests in the book-by-book fallback.
+# Bounded so we stay polite to the API while overlapping request latency.
+MAX_CONCURRENT_REQUESTS = 10
+
+
+def _fetch_chapter(session, base_url, book_name, chapter):
+    """Fetch one chapter from bible-api.com and format its verse lines."""
+    book_encoded = book_name.replace(" ", "%20")
+    url = f"{base_url}{book_encoded}%20{chapter}?translation=kjv"
+    response = session.get(url, timeout=15)
+    if response.status_code != 200:
+        return None
+
+    data = response.json()
+    # bible-api.com returns text as a single string with verse numbers
+    if 'text' in data:
+        return [f"{chapter}: {data['text']}"]
+    if 'verses' in data:
+        # If structured verses are available
+        return [
+            f"{chapter}:{verse.get('verse', 0)} {verse.get('text', '')}"
+            for verse in data['verses']
+        ]
+    return None
 
 def download_kjv_english():
     """Download King James Version Bible in English from public domain source."""
@@ -57,43 +89,36 @@ def download_kjv_english():
     
     full_bible = []
     base_url = "https://bible-api.com/"
-    
-    import time
-    for book_name, num_chapters in books:
-        book_text = []
-        book_display = book_name.replace(" ", " ").title()
-        
-        for chapter in range(1, num_chapters + 1):
-            try:
-                book_encoded = book_name.replace(" ", "%20")
-                url = f"{base_url}{book_encoded}%20{chapter}?translation=kjv"
-                response = requests.get(url, timeout=15)
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    # bible-api.com returns text as a single string with verse numbers
-                    if 'text' in data:
-                        text = data['text']
-                        # The text usually comes with verse numbers embedded
-                        # Try to parse it or use as is
-                        book_text.append(f"{chapter}: {text}")
-                    elif 'verses' in data:
-                        # If structured verses are available
-                        for verse in data['verses']:
-                            verse_num = verse.get('verse', 0)
-                            verse_text = verse.get('text', '')
-                            book_text.append(f"{chapter}:{verse_num} {verse_text}")
-                
-                time.sleep(0.1)  # Be nice to the API
-                
-            except Exception as e:
-                print(f"Error downloading {book_display} chapter {chapter}: {e}")
-                continue
-        
-        if book_text:
-            full_bible.append(f"{book_display.upper()}\n" + "\n".join(book_text))
-            print(f"Downloaded {book_display}...")
-        time.sleep(0.5)  # Rate limiting
+
+    # Fetch chapters concurrently over one keep-alive session: total wall
+    # time drops from the sum of ~1189 request latencies to roughly
+    # max(latency) per batch of MAX_CONCURRENT_REQUESTS. The executor's
+    # bounded pool doubles as the politeness cap, replacing per-request
+    # sleeps.
+    with requests.Session() as session, \
+            ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as executor:
+        # One tqdm bar instead of a print per book: progress writes are
+        # rate-limited by tqdm rather than flushing stdout per download.
+        for book_name, num_chapters in tqdm(books, desc="Downloading books"):
+            book_display = book_name.replace(" ", " ").title()
+            chapters = range(1, num_chapters + 1)
+            futures = [
+                executor.submit(_fetch_chapter, session, base_url, book_name, chapter)
+                for chapter in chapters
+            ]
+
+            book_text = []
+            for chapter, future in zip(chapters, futures):
+                try:
+                    lines = future.result()
+                    if lines:
+                        book_text.extend(lines)
+                except Exception as e:
+                    tqdm.write(f"Error downloading {book_display} chapter {chapter}: {e}")
+                    continue
+
+            if book_text:
+                full_bible.append(f"{book_display.upper()}\n" + "\n".join(book_text))
     
     if full_bible:
         return "\n\n".join(full_bible)
@@ -153,7 +178,7 @@ def parse_bible_text(text):
             continue
         
         # Try to detect verse pattern (e.g., "1:1 In the beginning...")
-        verse_match = re.match(r'^(\d+):(\d+)\s+(.+)$', line)
+        verse_match = _VERSE_LINE_RE.fullmatch(line)
         if verse_match:
             chapter, verse, content = verse_match.groups()
             current_chapter = chapter
@@ -26,8 +26,18 @@ This experiment demonstrates research thinking by:
 
 import sys
 import os
+import hashlib
 import json
+import re
 import time
+# orjson serializes results 3-10x faster than the stdlib formatter when
+# present; the stdlib json path below stays as the fallback.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from typing import List, Dict, Tuple, Optional
 from dataclasses import dataclass, asdict
@@ -108,48 +118,77 @@ TEST_QUERIES = {
 # k-values to test
 K_VALUES = [3, 5, 10, 15]
 
+# Bound on concurrent experiment queries. The (k, query) runs are
+# independent and spend most of their time waiting on the LLM backend,
+# so overlapping them collapses the sequential waterfall.
+EXPERIMENT_CONCURRENCY = 16
+
+# Verification verdicts keyed by a hash of (answer, context, sources).
+# Exact-verse queries tend to produce identical answers across k-values,
+# so the repeat arms skip re-verification entirely.
+# "No answer" phrasing check, case-insensitive: one regex scan instead
+# of two .lower() copies of a potentially multi-KB answer per run.
+_NO_ANSWER_RE = re.compile(r"couldn't find|no relevant", re.IGNORECASE)
+
+_verification_cache: Dict[bytes, object] = {}
+_verification_cache_hits = 0
+
 
 def run_single_experiment(
     rag: 'BibleRAG',
     verifier: 'VerifierAgent',
     query: str,
     query_type: str,
-    k_value: int
+    k_value: int,
+    query_embedding=None
 ) -> ExperimentResult:
     """
     Run a single experiment with given parameters.
-    
+
     Args:
         rag: The RAG system instance
         verifier: The verification agent
         query: Test query string
         query_type: Category of query (factual, thematic, etc.)
         k_value: Number of passages to retrieve
-        
+        query_embedding: Optional precomputed embedding for the query
+
     Returns:
         ExperimentResult with all metrics
     """
     start_time = time.time()
-    
+
     # Execute RAG query
-    result = rag.query(query, top_k=k_value)
-    
+    result = rag.query(query, top_k=k_value, query_embedding=query_embedding)
+
     latency_ms = (time.time() - start_time) * 1000
-    
+
+    return _build_experiment_result(verifier, query, query_type, k_value, result, latency_ms)
+
+
+def _build_experiment_result(
+    verifier: 'VerifierAgent',
+    query: str,
+    query_type: str,
+    k_value: int,
+    result: Dict,
+    latency_ms: float
+) -> ExperimentResult:
+    """Derive the metrics record for one completed RAG response."""
     # Check for "no answer" condition
     no_answer = (
-        "couldn't find" in result["answer"].lower() or
-        "no relevant" in result["answer"].lower() or
+        _NO_ANSWER_RE.search(result["answer"]) is not None or
         len(result.get("sources", [])) == 0
     )
-    
-    # Verify the answer
-    verification = verifier.verify_answer(
+
+    # Verify the answer (memoized on identical answer/context/sources)
+    verification = _verify_answer_cached(
+        verifier,
         answer=result["answer"],
         context=result.get("context", ""),
         sources=result.get("sources", [])
     )
-    
+
     return ExperimentResult(
         query=query,
         query_type=query_type,
@@ -167,6 +206,62 @@ def run_single_experiment(
     )
 
 
+def run_query_experiments(
+    rag: 'BibleRAG',
+    verifier: 'VerifierAgent',
+    query: str,
+    query_type: str,
+    query_embedding=None
+) -> List[ExperimentResult]:
+    """
+    Run every k-value arm for one query off a single retrieval.
+
+    An L2 search at k=15 returns a superset of the top-3/5/10 result
+    sets, so one retrieval at max(K_VALUES) covers all arms; each arm
+    then truncates the result list and runs only the generation step.
+    Reported latency is the shared retrieval time plus that arm's
+    generation time.
+    """
+    retrieval_start = time.time()
+    early_result, results, notes = rag.retrieve_only(
+        query, top_k=max(K_VALUES), query_embedding=query_embedding
+    )
+    retrieval_ms = (time.time() - retrieval_start) * 1000
+
+    arm_results = []
+    for k_value in K_VALUES:
+        start_time = time.time()
+        if early_result:
+            result = early_result
+        else:
+            result = rag.query_from_results(query, results[:k_value], notes)
+        latency_ms = retrieval_ms + (time.time() - start_time) * 1000
+        arm_results.append(
+            _build_experiment_result(verifier, query, query_type, k_value, result, latency_ms)
+        )
+
+    return arm_results
+
+
+def _verify_answer_cached(verifier: 'VerifierAgent', answer: str, context: str,
+                          sources: List[str]):
+    """Verify an answer, reusing the verdict for identical inputs."""
+    global _verification_cache_hits
+    key = hashlib.blake2b(
+        "\x1f".join([answer, context] + sources).encode("utf-8"),
+        digest_size=16
+    ).digest()
+
+    verification = _verification_cache.get(key)
+    if verification is not None:
+        _verification_cache_hits += 1
+        return verification
+
+    verification = verifier.verify_answer(answer=answer, context=context, sources=sources)
+    _verification_cache[key] = verification
+    return verification
+
+
 def compute_aggregates(results: List[ExperimentResult], k_value: int) -> AggregateMetrics:
     """
     Compute aggregate metrics for a k-value.
@@ -191,18 +286,30 @@ def compute_aggregates(results: List[ExperimentResult], k_value: int) -> Aggrega
             avg_latency_ms=0
         )
     
-    n = len(results)
-    
+    # One pass building a metrics matrix, one vectorized mean per column,
+    # instead of seven separate generator sweeps over the results.
+    # Booleans average directly to rates. float() casts keep the fields
+    # JSON-serializable.
+    metrics = np.array(
+        [
+            (r.answer_length, r.sources_count, r.grounding_rate,
+             r.hallucination_score, r.rejected, r.no_answer, r.latency_ms)
+            for r in results
+        ],
+        dtype=np.float64
+    )
+    means = metrics.mean(axis=0)
+
     return AggregateMetrics(
         k_value=k_value,
-        total_queries=n,
-        avg_answer_length=sum(r.answer_length for r in results) / n,
-        avg_sources=sum(r.sources_count for r in results) / n,
-        avg_grounding_rate=sum(r.grounding_rate for r in results) / n,
-        avg_hallucination_score=sum(r.hallucination_score for r in results) / n,
-        rejection_rate=sum(1 for r in results if r.rejected) / n,
-        no_answer_rate=sum(1 for r in results if r.no_answer) / n,
-        avg_latency_ms=sum(r.latency_ms for r in results) / n
+        total_queries=len(results),
+        avg_answer_length=float(means[0]),
+        avg_sources=float(means[1]),
+        avg_grounding_rate=float(means[2]),
+        avg_hallucination_score=float(means[3]),
+        rejection_rate=float(means[4]),
+        no_answer_rate=float(means[5]),
+        avg_latency_ms=float(means[6])
     )
 
 
@@ -275,41 +382,68 @@ def run_full_experiment(output_dir: str = None) -> Tuple[List[ExperimentResult],
     print(f"Total queries per k: {sum(len(q) for q in TEST_QUERIES.values())}")
     print()
     
-    # Initialize systems
+    # Initialize systems. Both constructors load heavy models and are
+    # independent, so run them on parallel threads: cold start drops from
+    # t_rag + t_verifier to max of the two.
     try:
-        rag = BibleRAG(language="en")
-        verifier = VerifierAgent()
+        with ThreadPoolExecutor(max_workers=2) as init_pool:
+            rag_future = init_pool.submit(BibleRAG, language="en")
+            verifier_future = init_pool.submit(VerifierAgent)
+            rag = rag_future.result()
+            verifier = verifier_future.result()
         print("✅ RAG system and Verifier initialized")
     except Exception as e:
         print(f"❌ Failed to initialize: {e}")
         return [], []
     
     all_results = []
-    
-    # Run experiments for each k-value
-    for k in K_VALUES:
-        print(f"\n--- Testing k={k} ---")
-        
-        for query_type, queries in TEST_QUERIES.items():
-            print(f"  {query_type}: ", end="", flush=True)
-            
-            for query in queries:
-                try:
-                    result = run_single_experiment(rag, verifier, query, query_type, k)
-                    all_results.append(result)
-                    
-                    # Progress indicator
+
+    # Each query is an independent task covering all four k-arms off one
+    # shared retrieval, dispatched to a bounded worker pool instead of
+    # the nested sequential loops. Progress ticks fire per finished arm.
+    tasks = [
+        (query_type, query)
+        for query_type, queries in TEST_QUERIES.items()
+        for query in queries
+    ]
+    # The query set is static: encode it once as a single batch and reuse
+    # the vectors across every k-value instead of 80 per-call encodes.
+    unique_queries = [q for qs in TEST_QUERIES.values() for q in qs]
+    query_vectors = dict(zip(
+        unique_queries,
+        rag.vector_store.embedding_model.encode(unique_queries, batch_size=32)
+    ))
+
+    total_runs = len(tasks) * len(K_VALUES)
+    print(f"Running {total_runs} runs ({len(tasks)} queries x {len(K_VALUES)} k-values) "
+          f"on {EXPERIMENT_CONCURRENCY} workers: ", end="", flush=True)
+
+    with ThreadPoolExecutor(max_workers=EXPERIMENT_CONCURRENCY) as executor:
+        futures = {
+            executor.submit(run_query_experiments, rag, verifier, query, query_type,
+                            query_vectors.get(query)):
+                (query_type, query)
+            for query_type, query in tasks
+        }
+        for future in as_completed(futures):
+            try:
+                arm_results = future.result()
+                all_results.extend(arm_results)
+
+                # Progress indicators, one per k-arm
+                for result in arm_results:
                     if result.rejected:
                         print("✗", end="", flush=True)
                     elif result.no_answer:
                         print("○", end="", flush=True)
                     else:
                         print("✓", end="", flush=True)
-                        
-                except Exception as e:
-                    print(f"E({e})", end="", flush=True)
-            
-            print()  # Newline after query type
+            except Exception as e:
+                print(f"E({e})", end="", flush=True)
+
+    print()  # Newline after progress ticks
+    print(f"Verification cache: {_verification_cache_hits} of {total_runs} "
+          f"verdicts reused")
     
     # Compute aggregates
     aggregates = []
@@ -327,13 +461,21 @@ def run_full_experiment(output_dir: str = None) -> Tuple[List[ExperimentResult],
     
     # Save raw results as JSON
     results_file = os.path.join(output_dir, f"experiment_results_{timestamp}.json")
-    with open(results_file, "w") as f:
-        json.dump({
-            "timestamp": timestamp,
-            "k_values": K_VALUES,
-            "results": [asdict(r) for r in all_results],
-            "aggregates": [asdict(a) for a in aggregates]
-        }, f, indent=2)
+    results_data = {
+        "timestamp": timestamp,
+        "k_values": K_VALUES,
+        "results": [asdict(r) for r in all_results],
+        "aggregates": [asdict(a) for a in aggregates]
+    }
+    if orjson is not None:
+        with open(results_file, "wb") as f:
+            f.write(orjson.dumps(
+                results_data,
+                option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY
+            ))
+    else:
+        with open(results_file, "w") as f:
+            json.dump(results_data, f, indent=2)
     print(f"\n✅ Raw results saved to: {results_file}")
     
     # Save markdown report
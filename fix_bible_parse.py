@@ -4,230 +4,292 @@ Re-parse the Bible with proper book name extraction for Gutenberg format
 import os
 import re
 import pickle
+import hashlib
+import sqlite3
 import numpy as np
 import faiss
+import torch
 from sentence_transformers import SentenceTransformer
 import config
 
+# Book name patterns for Gutenberg format
+BOOK_PATTERNS = [
+    r"The First Book of Moses: Called Genesis",
+    r"The Second Book of Moses: Called Exodus",
+    r"The Third Book of Moses: Called Leviticus",
+    r"The Fourth Book of Moses: Called Numbers",
+    r"The Fifth Book of Moses: Called Deuteronomy",
+    r"The Book of Joshua",
+    r"The Book of Judges",
+    r"The Book of Ruth",
+    r"The First Book of Samuel",
+    r"The Second Book of Samuel",
+    r"The First Book of the Kings",
+    r"The Second Book of the Kings",
+    r"The First Book of the Chronicles",
+    r"The Second Book of the Chronicles",
+    r"Ezra",
+    r"The Book of Nehemiah",
+    r"The Book of Esther",
+    r"The Book of Job",
+    r"The Book of Psalms",
+    r"The Proverbs",
+    r"Ecclesiastes",
+    r"The Song of Solomon",
+    r"The Book of the Prophet Isaiah",
+    r"The Book of the Prophet Jeremiah",
+    r"The Lamentations of Jeremiah",
+    r"The Book of the Prophet Ezekiel",
+    r"The Book of Daniel",
+    r"Hosea",
+    r"Joel",
+    r"Amos",
+    r"Obadiah",
+    r"Jonah",
+    r"Micah",
+    r"Nahum",
+    r"Habakkuk",
+    r"Zephaniah",
+    r"Haggai",
+    r"Zechariah",
+    r"Malachi",
+    r"The Gospel According to Saint Matthew",
+    r"The Gospel According to Saint Mark",
+    r"The Gospel According to Saint Luke",
+    r"The Gospel According to Saint John",
+    r"The Acts of the Apostles",
+    r"The Epistle.*to the Romans",
+    r"The First Epistle.*to the Corinthians",
+    r"The Second Epistle.*to the Corinthians",
+    r"The Epistle.*to the Galatians",
+    r"The Epistle.*to the Ephesians",
+    r"The Epistle.*to the Philippians",
+    r"The Epistle.*to the Colossians",
+    r"The First Epistle.*to the Thessalonians",
+    r"The Second Epistle.*to the Thessalonians",
+    r"The First Epistle.*to Timothy",
+    r"The Second Epistle.*to Timothy",
+    r"The Epistle.*to Titus",
+    r"The Epistle.*to Philemon",
+    r"The Epistle.*to the Hebrews",
+    r"The General Epistle of James",
+    r"The First Epistle.*of Peter",
+    r"The Second.*Epistle.*of Peter",
+    r"The First Epistle.*of John",
+    r"The Second Epistle.*of John",
+    r"The Third Epistle.*of John",
+    r"The General Epistle of Jude",
+    r"The Revelation"
+]
+
+# Short book names for references
+BOOK_SHORT_NAMES = {
+    "Genesis": "Genesis", "Exodus": "Exodus", "Leviticus": "Leviticus",
+    "Numbers": "Numbers", "Deuteronomy": "Deuteronomy", "Joshua": "Joshua",
+    "Judges": "Judges", "Ruth": "Ruth", "Samuel": "Samuel", "Kings": "Kings",
+    "Chronicles": "Chronicles", "Ezra": "Ezra", "Nehemiah": "Nehemiah",
+    "Esther": "Esther", "Job": "Job", "Psalms": "Psalms", "Proverbs": "Proverbs",
+    "Ecclesiastes": "Ecclesiastes", "Song": "Song of Solomon", "Isaiah": "Isaiah",
+    "Jeremiah": "Jeremiah", "Lamentations": "Lamentations", "Ezekiel": "Ezekiel",
+    "Daniel": "Daniel", "Hosea": "Hosea", "Joel": "Joel", "Amos": "Amos",
+    "Obadiah": "Obadiah", "Jonah": "Jonah", "Micah": "Micah", "Nahum": "Nahum",
+    "Habakkuk": "Habakkuk", "Zephaniah": "Zephaniah", "Haggai": "Haggai",
+    "Zechariah": "Zechariah", "Malachi": "Malachi", "Matthew": "Matthew",
+    "Mark": "Mark", "Luke": "Luke", "John": "John", "Acts": "Acts",
+    "Romans": "Romans", "Corinthians": "Corinthians", "Galatians": "Galatians",
+    "Ephesians": "Ephesians", "Philippians": "Philippians", "Colossians": "Colossians",
+    "Thessalonians": "Thessalonians", "Timothy": "Timothy", "Titus": "Titus",
+    "Philemon": "Philemon", "Hebrews": "Hebrews", "James": "James",
+    "Peter": "Peter", "Jude": "Jude", "Revelation": "Revelation"
+}
+
+# Content-addressable embedding cache: rows are keyed by sha256 of the
+# chunk text plus the model name, so re-runs after small edits only
+# re-encode the chunks that actually changed (and a model swap never
+# serves stale vectors). Vectors are stored as fp16 bytes.
+EMBEDDING_CACHE_PATH = 'data/embedding_cache.sqlite'
+
+# One master pattern classifying every non-blank line in a single
+# C-level finditer pass: a line containing any Gutenberg book title, a
+# "chapter:verse text" line, or anything else (continuations, markers).
+# Alternative order mirrors the old dispatch: book check wins over the
+# verse check. Replaces ~67 Python-level re.search calls per line.
+_GUT_MASTER_RE = re.compile(
+    r'^[^\S\n]*(?:'
+    r'(?P<bookline>[^\n]*?(?:' + '|'.join(f'(?:{p})' for p in BOOK_PATTERNS) + r')[^\n]*)'
+    r'|(?P<ch>\d+):(?P<v>\d+)\s+(?P<vtxt>[^\n]+)'
+    r'|(?P<other>\S[^\n]*)'
+    r')$',
+    re.MULTILINE | re.IGNORECASE)
+
+
 def parse_gutenberg_bible(filepath):
     """Parse Gutenberg KJV Bible format."""
     with open(filepath, 'r', encoding='utf-8') as f:
         text = f.read()
-    
+
     verses = []
-    lines = text.split('\n')
-    
-    # Book name patterns for Gutenberg format
-    book_patterns = [
-        r"The First Book of Moses: Called Genesis",
-        r"The Second Book of Moses: Called Exodus", 
-        r"The Third Book of Moses: Called Leviticus",
-        r"The Fourth Book of Moses: Called Numbers",
-        r"The Fifth Book of Moses: Called Deuteronomy",
-        r"The Book of Joshua",
-        r"The Book of Judges",
-        r"The Book of Ruth",
-        r"The First Book of Samuel",
-        r"The Second Book of Samuel",
-        r"The First Book of the Kings",
-        r"The Second Book of the Kings",
-        r"The First Book of the Chronicles",
-        r"The Second Book of the Chronicles",
-        r"Ezra",
-        r"The Book of Nehemiah",
-        r"The Book of Esther",
-        r"The Book of Job",
-        r"The Book of Psalms",
-        r"The Proverbs",
-        r"Ecclesiastes",
-        r"The Song of Solomon",
-        r"The Book of the Prophet Isaiah",
-        r"The Book of the Prophet Jeremiah",
-        r"The Lamentations of Jeremiah",
-        r"The Book of the Prophet Ezekiel",
-        r"The Book of Daniel",
-        r"Hosea",
-        r"Joel",
-        r"Amos",
-        r"Obadiah",
-        r"Jonah",
-        r"Micah",
-        r"Nahum",
-        r"Habakkuk",
-        r"Zephaniah",
-        r"Haggai",
-        r"Zechariah",
-        r"Malachi",
-        r"The Gospel According to Saint Matthew",
-        r"The Gospel According to Saint Mark",
-        r"The Gospel According to Saint Luke",
-        r"The Gospel According to Saint John",
-        r"The Acts of the Apostles",
-        r"The Epistle.*to the Romans",
-        r"The First Epistle.*to the Corinthians",
-        r"The Second Epistle.*to the Corinthians",
-        r"The Epistle.*to the Galatians",
-        r"The Epistle.*to the Ephesians",
-        r"The Epistle.*to the Philippians",
-        r"The Epistle.*to the Colossians",
-        r"The First Epistle.*to the Thessalonians",
-        r"The Second Epistle.*to the Thessalonians",
-        r"The First Epistle.*to Timothy",
-        r"The Second Epistle.*to Timothy",
-        r"The Epistle.*to Titus",
-        r"The Epistle.*to Philemon",
-        r"The Epistle.*to the Hebrews",
-        r"The General Epistle of James",
-        r"The First Epistle.*of Peter",
-        r"The Second.*Epistle.*of Peter",
-        r"The First Epistle.*of John",
-        r"The Second Epistle.*of John",
-        r"The Third Epistle.*of John",
-        r"The General Epistle of Jude",
-        r"The Revelation"
-    ]
-    
-    # Short book names for references
-    book_short_names = {
-        "Genesis": "Genesis", "Exodus": "Exodus", "Leviticus": "Leviticus",
-        "Numbers": "Numbers", "Deuteronomy": "Deuteronomy", "Joshua": "Joshua",
-        "Judges": "Judges", "Ruth": "Ruth", "Samuel": "Samuel", "Kings": "Kings",
-        "Chronicles": "Chronicles", "Ezra": "Ezra", "Nehemiah": "Nehemiah",
-        "Esther": "Esther", "Job": "Job", "Psalms": "Psalms", "Proverbs": "Proverbs",
-        "Ecclesiastes": "Ecclesiastes", "Song": "Song of Solomon", "Isaiah": "Isaiah",
-        "Jeremiah": "Jeremiah", "Lamentations": "Lamentations", "Ezekiel": "Ezekiel",
-        "Daniel": "Daniel", "Hosea": "Hosea", "Joel": "Joel", "Amos": "Amos",
-        "Obadiah": "Obadiah", "Jonah": "Jonah", "Micah": "Micah", "Nahum": "Nahum",
-        "Habakkuk": "Habakkuk", "Zephaniah": "Zephaniah", "Haggai": "Haggai",
-        "Zechariah": "Zechariah", "Malachi": "Malachi", "Matthew": "Matthew",
-        "Mark": "Mark", "Luke": "Luke", "John": "John", "Acts": "Acts",
-        "Romans": "Romans", "Corinthians": "Corinthians", "Galatians": "Galatians",
-        "Ephesians": "Ephesians", "Philippians": "Philippians", "Colossians": "Colossians",
-        "Thessalonians": "Thessalonians", "Timothy": "Timothy", "Titus": "Titus",
-        "Philemon": "Philemon", "Hebrews": "Hebrews", "James": "James",
-        "Peter": "Peter", "Jude": "Jude", "Revelation": "Revelation"
-    }
-    
+
     current_book = None
     current_book_short = "Unknown"
-    verse_pattern = re.compile(r'^(\d+):(\d+)\s+(.+)$')
-    
+
     verse_text_buffer = []
     current_chapter = None
     current_verse = None
-    
-    for line in lines:
-        line = line.strip()
-        if not line:
+
+    def flush_buffer():
+        if verse_text_buffer and current_chapter and current_verse:
+            verses.append({
+                'book': current_book_short,
+                'chapter': current_chapter,
+                'verse': current_verse,
+                'text': ' '.join(verse_text_buffer),
+                'reference': f"{current_book_short} {current_chapter}:{current_verse}"
+            })
+
+    for m in _GUT_MASTER_RE.finditer(text):
+        kind = m.lastgroup
+
+        # Book title line: flush any buffered verse, switch books
+        if kind == 'bookline':
+            line = m.group('bookline').strip()
+            current_book = line
+            # Extract short name
+            for short, full in BOOK_SHORT_NAMES.items():
+                if short.lower() in line.lower():
+                    current_book_short = full
+                    break
+            flush_buffer()
+            verse_text_buffer = []
             continue
-        
-        # Check if this line is a book name
-        is_book = False
-        for pattern in book_patterns:
-            if re.search(pattern, line, re.IGNORECASE):
-                current_book = line
-                # Extract short name
-                for short, full in book_short_names.items():
-                    if short.lower() in line.lower():
-                        current_book_short = full
-                        break
-                is_book = True
-                break
-        
-        if is_book:
-            # Save any buffered verse
-            if verse_text_buffer and current_chapter and current_verse:
-                full_text = ' '.join(verse_text_buffer)
-                verses.append({
-                    'book': current_book_short,
-                    'chapter': current_chapter,
-                    'verse': current_verse,
-                    'text': full_text,
-                    'reference': f"{current_book_short} {current_chapter}:{current_verse}"
-                })
-                verse_text_buffer = []
+
+        # Verse line: flush the previous verse, start a new buffer
+        if kind == 'vtxt':
+            flush_buffer()
+            current_chapter = int(m.group('ch'))
+            current_verse = int(m.group('v'))
+            verse_text_buffer = [m.group('vtxt').strip()]
             continue
-        
-        # Check for verse pattern
-        match = verse_pattern.match(line)
-        if match:
-            # Save previous verse if exists
-            if verse_text_buffer and current_chapter and current_verse:
-                full_text = ' '.join(verse_text_buffer)
-                verses.append({
-                    'book': current_book_short,
-                    'chapter': current_chapter,
-                    'verse': current_verse,
-                    'text': full_text,
-                    'reference': f"{current_book_short} {current_chapter}:{current_verse}"
-                })
-            
-            current_chapter = int(match.group(1))
-            current_verse = int(match.group(2))
-            verse_text_buffer = [match.group(3)]
-        else:
-            # Continuation of previous verse
-            if line and not line.startswith('***') and current_chapter:
-                verse_text_buffer.append(line)
-    
+
+        # Continuation of previous verse
+        line = m.group('other').strip()
+        if line and not line.startswith('***') and current_chapter:
+            verse_text_buffer.append(line)
+
     # Save last verse
-    if verse_text_buffer and current_chapter and current_verse:
-        full_text = ' '.join(verse_text_buffer)
-        verses.append({
-            'book': current_book_short,
-            'chapter': current_chapter,
-            'verse': current_verse,
-            'text': full_text,
-            'reference': f"{current_book_short} {current_chapter}:{current_verse}"
-        })
-    
+    flush_buffer()
+
     return verses
 
 def create_chunks(verses, chunk_size=500, overlap=50):
     """Create chunks from verses."""
+    if not verses:
+        return []
+
+    # Column views of the verse records: one vectorized comparison finds
+    # every (book, chapter) boundary, so the per-verse loop below only
+    # ever splits by size inside a segment - no change-detection branches.
+    books = np.array([v['book'] for v in verses])
+    chapters = np.array([v['chapter'] for v in verses], dtype=np.int32)
+    boundaries = np.flatnonzero(
+        (chapters[1:] != chapters[:-1]) | (books[1:] != books[:-1])
+    ) + 1
+    starts = np.concatenate(([0], boundaries))
+    ends = np.concatenate((boundaries, [len(verses)]))
+
     chunks = []
-    current_text = []
-    current_references = []
-    current_book = None
-    current_chapter = None
-    
-    for verse in verses:
-        book = verse['book']
-        chapter = verse['chapter']
-        
-        # Save chunk if needed
-        if (current_book and current_book != book) or \
-           (current_chapter and current_chapter != chapter) or \
-           (len(' '.join(current_text)) > chunk_size):
-            
-            if current_text:
+    for seg_start, seg_end in zip(starts, ends):
+        book = verses[seg_start]['book']
+        chapter = verses[seg_start]['chapter']
+        current_text = []
+        current_references = []
+        # Running length of ' '.join(current_text); avoids re-joining the
+        # accumulated verses for every size check.
+        current_len = 0
+
+        for i in range(seg_start, seg_end):
+            # Save chunk if needed
+            if current_text and current_len > chunk_size:
                 chunks.append({
                     'text': ' '.join(current_text),
-                    'references': list(set(current_references)),
-                    'book': current_book,
-                    'chapter': current_chapter,
+                    'references': list(dict.fromkeys(current_references)),
+                    'book': book,
+                    'chapter': chapter,
                     'language': 'en'
                 })
                 current_text = []
                 current_references = []
-        
-        current_book = book
-        current_chapter = chapter
-        current_text.append(verse['text'])
-        current_references.append(verse['reference'])
-    
-    # Add remaining
-    if current_text:
-        chunks.append({
-            'text': ' '.join(current_text),
-            'references': list(set(current_references)),
-            'book': current_book,
-            'chapter': current_chapter,
-            'language': 'en'
-        })
-    
+                current_len = 0
+
+            verse = verses[i]
+            current_len = current_len + len(verse['text']) + 1 if current_text else len(verse['text'])
+            current_text.append(verse['text'])
+            current_references.append(verse['reference'])
+
+        # Add remaining
+        if current_text:
+            chunks.append({
+                'text': ' '.join(current_text),
+                'references': list(dict.fromkeys(current_references)),
+                'book': book,
+                'chapter': chapter,
+                'language': 'en'
+            })
+
     return chunks
 
+def encode_with_cache(model, texts, device):
+    """
+    Encode texts, reusing cached vectors for unchanged chunks.
+    Only cache misses go through model.encode; hits are read back from
+    the sqlite DB, so incremental re-runs finish in seconds.
+    """
+    os.makedirs(os.path.dirname(EMBEDDING_CACHE_PATH), exist_ok=True)
+    conn = sqlite3.connect(EMBEDDING_CACHE_PATH)
+    try:
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings "
+            "(hash BLOB, model TEXT, vec BLOB, PRIMARY KEY (hash, model))"
+        )
+        cached = dict(conn.execute(
+            "SELECT hash, vec FROM embeddings WHERE model = ?",
+            (config.EMBEDDING_MODEL,)
+        ))
+
+        hashes = [hashlib.sha256(t.encode('utf-8')).digest() for t in texts]
+        miss_idx = [i for i, h in enumerate(hashes) if h not in cached]
+        print(f"Embedding cache: {len(texts) - len(miss_idx)} hits, {len(miss_idx)} misses")
+
+        if miss_idx:
+            new_embeddings = model.encode(
+                [texts[i] for i in miss_idx], show_progress_bar=True,
+                batch_size=256, convert_to_numpy=True, device=device
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (hash, model, vec) VALUES (?, ?, ?)",
+                [(hashes[i], config.EMBEDDING_MODEL,
+                  new_embeddings[j].astype(np.float16).tobytes())
+                 for j, i in enumerate(miss_idx)]
+            )
+            conn.commit()
+            dimension = new_embeddings.shape[1]
+        else:
+            dimension = len(next(iter(cached.values()))) // 2
+
+        # Scatter hits and misses into the final matrix in chunk order
+        embeddings = np.empty((len(texts), dimension), dtype=np.float32)
+        miss_pos = dict(zip(miss_idx, range(len(miss_idx))))
+        for i, h in enumerate(hashes):
+            j = miss_pos.get(i)
+            if j is not None:
+                embeddings[i] = new_embeddings[j]
+            else:
+                embeddings[i] = np.frombuffer(cached[h], dtype=np.float16)
+        return embeddings
+    finally:
+        conn.close()
+
+
 def main():
     print("Re-parsing Bible with proper format...")
     
@@ -250,14 +312,39 @@ def main():
     
     print("Creating embeddings (this takes a few minutes)...")
     texts = [chunk['text'] for chunk in chunks]
-    embeddings = model.encode(texts, show_progress_bar=True, batch_size=32)
-    embeddings = np.array(embeddings).astype('float32')
-    
-    # Create FAISS index
+    # One-off bulk encode: a large batch amortizes per-batch Python and
+    # kernel-launch overhead, and fp16 on GPU halves memory bandwidth.
+    # encode() already buckets inputs by length internally, so no manual
+    # pre-sort is needed.
+    device = 'cuda' if torch.cuda.is_available() else 'cpu'
+    if device == 'cuda':
+        model = model.half()
+    embeddings = encode_with_cache(model, texts, device)
+
+    # Create FAISS index. Same IVF-PQ fast-scan recipe as
+    # BibleVectorStore.create_index, so the rebuilt index has the same
+    # sub-linear search profile the app loads; the model is trained for
+    # cosine similarity, so normalize and use inner product throughout.
     print("Creating FAISS index...")
+    faiss.normalize_L2(embeddings)
     dimension = embeddings.shape[1]
-    index = faiss.IndexFlatL2(dimension)
-    index.add(embeddings)
+    n_vectors = embeddings.shape[0]
+    nlist = min(4096, max(16, n_vectors // 39))
+    if n_vectors >= 39 * 16 and dimension % 32 == 0:
+        print(f"Building IVF{nlist},PQ32x4fs index...")
+        index = faiss.index_factory(dimension, f"IVF{nlist},PQ32x4fs", faiss.METRIC_INNER_PRODUCT)
+        index.train(embeddings)
+        index.add(embeddings)
+        index.nprobe = min(32, nlist)
+    else:
+        # Brute-force fallback still benefits from fp16 storage: a flat
+        # scan is memory-bound, so halving the bytes per vector halves
+        # the bandwidth per query at negligible recall cost.
+        index = faiss.IndexScalarQuantizer(
+            dimension, faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_INNER_PRODUCT
+        )
+        index.train(embeddings)
+        index.add(embeddings)
     print(f"Index created with {index.ntotal} vectors")
     
     # Save
@@ -267,7 +354,7 @@ def main():
     
     faiss.write_index(index, index_path)
     with open(metadata_path, 'wb') as f:
-        pickle.dump(chunks, f)
+        pickle.dump(chunks, f, protocol=pickle.HIGHEST_PROTOCOL)
     
     print(f"\nVector store saved!")
     print("Done! Restart the app to see proper book names.")
@@ -5,9 +5,9 @@ import config
 # Lazy load heavy modules
 def get_vector_store():
     import torch
-    # Force CPU for stability during indexing
-    os.environ["OMP_NUM_THREADS"] = "1"
-    os.environ["MKL_NUM_THREADS"] = "1"
+    # No OMP/MKL clamps here: BibleVectorStore.__init__ already sets
+    # faiss.omp_set_num_threads, and single-threading FAISS and BLAS
+    # cripples the compute-bound indexing path.
     from vector_store import BibleVectorStore
     return BibleVectorStore
 
@@ -4,11 +4,73 @@ Uses OpenAI API with Query Disambiguation and Canonical Anchor Retrieval
 """
 import os
 import re
+from collections import OrderedDict, defaultdict
+from functools import lru_cache
 from typing import List, Dict, Optional, Tuple
 from openai import OpenAI
 import config
 from vector_store import BibleVectorStore
 
+
+@lru_cache(maxsize=1)
+def _get_openai_client():
+    """
+    One OpenAI client per process. The client owns an httpx connection
+    pool, so sharing it across BibleRAG instances (and Streamlit reruns)
+    reuses keepalive connections instead of paying DNS + TLS handshakes
+    on every rebuild.
+    """
+    return OpenAI(api_key=config.OPENAI_API_KEY)
+
+# Entries kept in the per-instance answer LRU. Bible Q&A traffic is
+# heavily repetitive ("Who built the ark?"), and a hit skips the whole
+# embed + FAISS + LLM pipeline.
+ANSWER_CACHE_SIZE = 2048
+
+# Verse-reference patterns, compiled once at import instead of per call.
+# Pattern 1: "Book Chapter:Verse" (e.g. "Psalm 110:1"); pattern 2:
+# "Book Chapter" (e.g. "Exodus 3").
+_VERSE_REF_RE = re.compile(r'([a-zA-Z]+)\s+(\d+):(\d+)')
+_CHAPTER_REF_RE = re.compile(r'([a-zA-Z]+)\s+(\d+)')
+
+# Common Bible book names (lowercase), shared by detect_verse_reference
+BIBLE_BOOKS = (
+    "genesis", "exodus", "leviticus", "numbers", "deuteronomy",
+    "joshua", "judges", "ruth", "samuel", "kings", "chronicles",
+    "ezra", "nehemiah", "esther", "job", "psalm", "psalms", "proverbs",
+    "ecclesiastes", "song", "isaiah", "jeremiah", "lamentations",
+    "ezekiel", "daniel", "hosea", "joel", "amos", "obadiah", "jonah",
+    "micah", "nahum", "habakkuk", "zephaniah", "haggai", "zechariah", "malachi",
+    "matthew", "mark", "luke", "john", "acts", "romans", "corinthians",
+    "galatians", "ephesians", "philippians", "colossians", "thessalonians",
+    "timothy", "titus", "philemon", "hebrews", "james", "peter", "jude", "revelation"
+)
+
+_BOOKS_SET = frozenset(BIBLE_BOOKS)
+
+# First-match table for the loose book matching below: for every known
+# word, the first book (in BIBLE_BOOKS order) equal to or contained in
+# it, e.g. "psalms" -> "psalm". Unknown words fall back to the scan.
+_BOOK_MATCH = {}
+for _part in BIBLE_BOOKS:
+    for _book in BIBLE_BOOKS:
+        if _book in _part:
+            _BOOK_MATCH[_part] = _book
+            break
+del _part, _book
+
+
+def _match_book(part: str) -> Optional[str]:
+    """First book name equal to or contained in part, or None."""
+    book = _BOOK_MATCH.get(part)
+    if book is not None:
+        return book
+    for b in BIBLE_BOOKS:
+        if b in part:
+            return b
+    return None
+
+
 # Ambiguous Bible terms that need context
 AMBIGUOUS_TERMS = {
     "ark": {
@@ -100,46 +162,145 @@ THEMATIC_ANCHORS = {
     }
 }
 
+# System prompts, parsed once at import; BibleRAG pins its language's
+# prompt in __init__ instead of rebuilding this dict per response.
+_SYSTEM_PROMPTS = {
+    "en": """You are a helpful Bible assistant. Answer questions based ONLY on the provided Bible passages.
+
+RULES:
+1. Use ONLY the information from the provided Bible passages below
+2. Cite Bible references (book chapter:verse) from the passages
+3. Keep answers concise and direct
+
+CRITICAL ACCURACY RULES:
+4. Do NOT claim one verse "references" another unless explicitly stated in the text
+5. Do NOT connect Old Testament to New Testament passages as if one quotes the other
+6. For symbolic/metaphorical concepts (rock, light, shepherd, etc.): describe what EACH passage says separately
+7. If metaphor attribution is unclear, use cautious phrasing like "This passage describes..." or "Similarly..."
+8. Only state what the text explicitly says - avoid interpretation
+
+VERB-MATCHING RULE:
+9. Match your answer to the question's verb:
+   - If question asks "who APPEARS", answer about who appears (not who speaks)
+   - If question asks "who SPEAKS", answer about who speaks
+   - If question asks "who SENDS", answer about who sends
+   - Distinguish between appearing, speaking, going, sending, etc.
+
+CONTEXT PRIORITY RULE (for cross-testament clarity):
+10. When question asks about OT figures (Abraham, Moses, David, etc.):
+    - FIRST describe what the OT passages say (Genesis, Exodus, etc.)
+    - THEN, if NT passages are included, say "Later NT passages describe..." or "In the New Testament..."
+    - This helps users understand the original context vs later interpretation
+
+Be helpful but precise. Accuracy over creativity.""",
+
+    "ta": """நீங்கள் ஒரு உதவிகரமான வேதாகம உதவியாளர். வழங்கப்பட்ட வேதாகம பத்திகளின் அடிப்படையில் மட்டுமே கேள்விகளுக்கு பதிலளிக்கவும்.
+
+விதிகள்:
+1. கீழே உள்ள வேதாகம பத்திகளிலிருந்து மட்டுமே தகவலைப் பயன்படுத்தவும்
+2. பத்திகளிலிருந்து வேதாகம மேற்கோள்களை (நூல் அதிகாரம்:வசனம்) குறிப்பிடவும்
+3. பதில்களை சுருக்கமாகவும் நேரடியாகவும் வைக்கவும்
+
+முக்கிய துல்லிய விதிகள்:
+4. உரையில் வெளிப்படையாகக் குறிப்பிடப்படாவிட்டால், ஒரு வசனம் மற்றொன்றை "குறிப்பிடுகிறது" என்று கூறாதீர்கள்
+5. ஒன்று மற்றொன்றை மேற்கோள் காட்டுவது போல் பழைய ஏற்பாடு மற்றும் புதிய ஏற்பாடு பத்திகளை இணைக்காதீர்கள்
+6. குறியீட்டு/உருவக கருத்துகளுக்கு: ஒவ்வொரு பத்தியும் என்ன சொல்கிறது என்பதை தனித்தனியாக விவரிக்கவும்
+7. துல்லியமாக இருங்கள் - படைப்பாற்றலை விட துல்லியம் முக்கியம்."""
+}
+
+# Single-pass trigger scanners: every theme trigger / ambiguous term /
+# context-clue word is folded into one longest-first alternation, so each
+# query is scanned once instead of once per keyword. re's C-level
+# alternation gives the same one-scan multi-pattern behavior an
+# Aho-Corasick automaton would, without another dependency.
+_THEME_SCAN_TERMS = sorted(
+    {t for cfg in THEMATIC_ANCHORS.values() for t in cfg.get("triggers", [])}
+    | {cfg["book_filter"] for cfg in THEMATIC_ANCHORS.values() if cfg.get("book_filter")}
+    | {"abraham", "genesis"},
+    key=len, reverse=True
+)
+_THEME_SCAN_RE = re.compile("|".join(re.escape(t) for t in _THEME_SCAN_TERMS))
+
+_AMBIG_SCAN_TERMS = sorted(
+    set(AMBIGUOUS_TERMS)
+    | {w for info in AMBIGUOUS_TERMS.values()
+       for clue in info["context_clues"].values() for w in clue.split()}
+    | {"built", "build", "made", "who"},
+    key=len, reverse=True
+)
+_AMBIG_SCAN_RE = re.compile("|".join(re.escape(t) for t in _AMBIG_SCAN_TERMS))
+
+
+def _result_refs(result: Dict) -> str:
+    """Reference label for one retrieved chunk in the context block."""
+    refs = result.get('references')
+    if refs:
+        return ", ".join(refs)
+    return f"{result.get('book', 'Unknown')} {result.get('chapter', '?')}"
+
+
+def _scan_terms(scan_re, terms, text):
+    """
+    One alternation pass over text; returns the subset of terms present.
+    A containment check over the matched strings keeps per-term substring
+    semantics (e.g. 'commandment' hits when 'ten commandments' matched).
+    """
+    found = {m.group(0) for m in scan_re.finditer(text)}
+    if not found:
+        return found
+    return {t for t in terms if any(t in f for f in found)}
+
+
 class BibleRAG:
     def __init__(self, language: str = "en"):
         self.language = language
         self.vector_store = BibleVectorStore(language=language)
         self.client = None
+        self._system_prompt = _SYSTEM_PROMPTS.get(language, _SYSTEM_PROMPTS["en"])
+        self._answer_cache = OrderedDict()
+        self.answer_cache_hits = 0
         
         # Initialize OpenAI if API key is available
         if config.OPENAI_API_KEY:
-            self.client = OpenAI(api_key=config.OPENAI_API_KEY)
+            self.client = _get_openai_client()
         
         # Load vector store
         if not self.vector_store.load_index():
             raise ValueError(f"Vector store not found for language {language}. Please create index first.")
-    
+
+        # Bucket chunks by (book, chapter) once so the verse-pin and
+        # thematic paths do dict lookups instead of scanning every chunk
+        # per query. _book_names keeps distinct lowercased book names in
+        # corpus order for the loose book-name containment matching.
+        self._chunks_by_book_chapter = defaultdict(list)
+        for chunk in self.vector_store.chunks:
+            key = (chunk['book_lc'], chunk.get('chapter'))
+            self._chunks_by_book_chapter[key].append(chunk)
+        self._book_names = list(dict.fromkeys(k[0] for k in self._chunks_by_book_chapter))
+
     def detect_thematic_query(self, query: str) -> Optional[Dict]:
         """
         Detect if query is asking about a major Bible theme.
         Returns the matching theme config or None.
         """
-        query_lower = query.lower()
-        
-        for theme_key, theme_config in THEMATIC_ANCHORS.items():
+        hits = _scan_terms(_THEME_SCAN_RE, _THEME_SCAN_TERMS, query.lower())
+        if not hits:
+            return None
+
+        # For Abraham + Genesis specifically
+        if "abraham" in hits and "genesis" in hits:
+            return THEMATIC_ANCHORS["abraham_promise"]
+
+        for theme_config in THEMATIC_ANCHORS.values():
             triggers = theme_config.get("triggers", [])
             book_filter = theme_config.get("book_filter")
-            
-            # Check if any trigger matches
-            trigger_match = any(trigger in query_lower for trigger in triggers)
-            
-            # Check if book is mentioned (for scoped queries like "in Genesis")
-            book_mentioned = book_filter and book_filter in query_lower
-            
-            # For Abraham + Genesis specifically
-            if "abraham" in query_lower and "genesis" in query_lower:
-                if theme_key == "abraham_promise":
-                    return theme_config
-            
-            # Match if trigger found AND (book matches OR book not specified in query)
-            if trigger_match and (book_mentioned or book_filter is None):
+
+            # Match if trigger found AND (book mentioned OR book not
+            # specified in query) - now set lookups over the scan hits
+            if any(trigger in hits for trigger in triggers) and \
+                    (book_filter is None or book_filter in hits):
                 return theme_config
-        
+
         return None
     
     def retrieve_thematic_anchors(self, theme_config: Dict) -> List[Dict]:
@@ -149,26 +310,23 @@ class BibleRAG:
         anchor_results = []
         book_filter = theme_config.get("book_filter", "").lower() if theme_config.get("book_filter") else None
         chapters = theme_config.get("chapters", [])
-        
+
         if not chapters or not hasattr(self.vector_store, 'chunks'):
             return []
-        
-        # Search through chunks for matching book + chapters
-        for chunk in self.vector_store.chunks:
-            chunk_book = chunk.get('book', '').lower()
-            chunk_chapter = chunk.get('chapter')
-            
+
+        # Pull matching (book, chapter) buckets straight from the index
+        for chunk_book in self._book_names:
             # Book must match if specified
             if book_filter and book_filter not in chunk_book:
                 continue
-            
-            # Chapter must be in the anchor list
-            if chunk_chapter in chapters:
-                anchor_results.append(chunk)
-        
+            for chapter in chapters:
+                anchor_results.extend(
+                    self._chunks_by_book_chapter.get((chunk_book, chapter), ())
+                )
+
         # Sort by chapter order
         anchor_results.sort(key=lambda x: (x.get('chapter', 0)))
-        
+
         return anchor_results[:10]  # Return up to 10 anchor chunks
     
     def detect_verse_reference(self, query: str) -> Optional[Tuple[str, int, Optional[int]]]:
@@ -176,53 +334,33 @@ class BibleRAG:
         Detect explicit verse or chapter references in query.
         Returns: (book, chapter, verse) or (book, chapter, None) for chapter-only
         """
-        # Common Bible book names
-        books = [
-            "genesis", "exodus", "leviticus", "numbers", "deuteronomy",
-            "joshua", "judges", "ruth", "samuel", "kings", "chronicles",
-            "ezra", "nehemiah", "esther", "job", "psalm", "psalms", "proverbs",
-            "ecclesiastes", "song", "isaiah", "jeremiah", "lamentations",
-            "ezekiel", "daniel", "hosea", "joel", "amos", "obadiah", "jonah",
-            "micah", "nahum", "habakkuk", "zephaniah", "haggai", "zechariah", "malachi",
-            "matthew", "mark", "luke", "john", "acts", "romans", "corinthians",
-            "galatians", "ephesians", "philippians", "colossians", "thessalonians",
-            "timothy", "titus", "philemon", "hebrews", "james", "peter", "jude", "revelation"
-        ]
-        
         query_lower = query.lower()
-        
+
         # Pattern 1: Book Chapter:Verse (e.g., "Psalm 110:1", "Genesis 1:26")
-        pattern_verse = r'([a-zA-Z]+)\s+(\d+):(\d+)'
-        match = re.search(pattern_verse, query_lower)
-        
+        match = _VERSE_REF_RE.search(query_lower)
+
         if match:
-            book_part = match.group(1).strip()
-            chapter = int(match.group(2))
-            verse = int(match.group(3))
-            
-            for book in books:
-                if book == book_part or book in book_part:
-                    return (book.title(), chapter, verse)
-        
+            book = _match_book(match.group(1).strip())
+            if book:
+                return (book.title(), int(match.group(2)), int(match.group(3)))
+
         # Pattern 2: Book Chapter or Chapter Book (e.g., "Exodus 3", "Chapter 3 Joel")
-        pattern_chapter = r'([a-zA-Z]+)\s+(\d+)'
-        match = re.search(pattern_chapter, query_lower)
-        
+        match = _CHAPTER_REF_RE.search(query_lower)
+
         if match:
             part1 = match.group(1).strip()
             part2 = int(match.group(2))
-            
+
             # Check if part1 is a book
-            for book in books:
-                if book == part1:
-                    return (book.title(), part2, None)
-            
+            if part1 in _BOOKS_SET:
+                return (part1.title(), part2, None)
+
             # Handle "chapter 3 joel" case
-            if "chapter" in part1 and any(book in query_lower for book in books):
-                for book in books:
-                    if book in query_lower:
-                        return (book.title(), part2, None)
-        
+            if "chapter" in part1:
+                book = next((b for b in BIBLE_BOOKS if b in query_lower), None)
+                if book:
+                    return (book.title(), part2, None)
+
         return None
     
     def retrieve_pinned_verse(self, book: str, chapter: int, verse: Optional[int] = None) -> List[Dict]:
@@ -231,51 +369,44 @@ class BibleRAG:
         STRICT EXACT MATCHING to prevent citation drift (e.g., 3:2 vs 33:2)
         """
         pinned_results = []
-        
+
         # Normalize book name for matching
         book_lower = book.lower()
-        
-        # Search through chunks for EXACT match
-        if hasattr(self.vector_store, 'chunks') and self.vector_store.chunks:
-            for chunk in self.vector_store.chunks:
-                chunk_book = chunk.get('book', '').lower()
-                chunk_chapter = chunk.get('chapter')
-                
-                # Book name must match
-                if book_lower not in chunk_book and chunk_book not in book_lower:
-                    continue
-                
+
+        # Only the (book, chapter) buckets matching the pinned location
+        # are inspected - the chapter constraint is baked into the key,
+        # so only the handful of same-chapter chunks are ever touched.
+        for chunk_book in self._book_names:
+            # Book name must match
+            if book_lower not in chunk_book and chunk_book not in book_lower:
+                continue
+
+            for chunk in self._chunks_by_book_chapter.get((chunk_book, chapter), ()):
                 # For chapter-only lookup
                 if verse is None:
-                    if chunk_chapter == chapter:
-                        pinned_results.append(chunk)
-                else:
-                    # For specific verse lookup - STRICT EXACT MATCHING
-                    # Chapter must match exactly first
-                    if chunk_chapter != chapter:
+                    pinned_results.append(chunk)
+                    continue
+
+                # For specific verse lookup - STRICT EXACT MATCHING
+                # Build exact target patterns
+                target_patterns = [
+                    f"{book} {chapter}:{verse}",      # "Exodus 3:2"
+                    f"{book.lower()} {chapter}:{verse}",
+                    f"{book.title()} {chapter}:{verse}"
+                ]
+
+                for ref_lower in chunk['references_lc']:
+                    # Check for exact verse match (with word boundaries)
+                    for pattern in target_patterns:
+                        if pattern.lower() == ref_lower or \
+                           ref_lower.endswith(f" {chapter}:{verse}") or \
+                           ref_lower == f"{chunk_book} {chapter}:{verse}":
+                            pinned_results.append(chunk)
+                            break
+                    else:
                         continue
-                    
-                    references = chunk.get('references', [])
-                    # Build exact target patterns
-                    target_patterns = [
-                        f"{book} {chapter}:{verse}",      # "Exodus 3:2"
-                        f"{book.lower()} {chapter}:{verse}",
-                        f"{book.title()} {chapter}:{verse}"
-                    ]
-                    
-                    for ref in references:
-                        ref_lower = ref.lower()
-                        # Check for exact verse match (with word boundaries)
-                        for pattern in target_patterns:
-                            if pattern.lower() == ref_lower or \
-                               ref_lower.endswith(f" {chapter}:{verse}") or \
-                               ref_lower == f"{chunk_book} {chapter}:{verse}":
-                                pinned_results.append(chunk)
-                                break
-                        else:
-                            continue
-                        break
-        
+                    break
+
         return pinned_results[:5]  # Return up to 5 matching chunks
     
     def disambiguate_query(self, query: str) -> Tuple[str, Optional[str]]:
@@ -283,22 +414,22 @@ class BibleRAG:
         Check for ambiguous terms and expand query with context.
         Returns: (expanded_query, disambiguation_note)
         """
-        query_lower = query.lower()
+        hits = _scan_terms(_AMBIG_SCAN_RE, _AMBIG_SCAN_TERMS, query.lower())
         disambiguation_note = None
         expanded_query = query
-        
+
         for term, info in AMBIGUOUS_TERMS.items():
-            if term in query_lower:
+            if term in hits:
                 # Check if user already provided context
                 context_found = False
                 for context_key, context_words in info["context_clues"].items():
-                    if any(word in query_lower for word in context_words.split()):
+                    if any(word in hits for word in context_words.split()):
                         context_found = True
                         break
-                
+
                 if not context_found:
                     # Add context based on common usage patterns
-                    if term == "ark" and any(w in query_lower for w in ["built", "build", "made", "who"]):
+                    if term == "ark" and any(w in hits for w in ["built", "build", "made", "who"]):
                         # "Who built the ark" likely means Noah's ark
                         expanded_query = query + " noah flood boat"
                         disambiguation_note = f"📌 Note: Interpreting 'ark' as Noah's Ark (the flood boat). For Ark of the Covenant, try asking about 'ark of the covenant'."
@@ -332,97 +463,51 @@ class BibleRAG:
         return None
     
     def get_language_prompts(self) -> str:
-        """Get system prompts in different languages."""
-        prompts = {
-            "en": """You are a helpful Bible assistant. Answer questions based ONLY on the provided Bible passages.
-
-RULES:
-1. Use ONLY the information from the provided Bible passages below
-2. Cite Bible references (book chapter:verse) from the passages
-3. Keep answers concise and direct
-
-CRITICAL ACCURACY RULES:
-4. Do NOT claim one verse "references" another unless explicitly stated in the text
-5. Do NOT connect Old Testament to New Testament passages as if one quotes the other
-6. For symbolic/metaphorical concepts (rock, light, shepherd, etc.): describe what EACH passage says separately
-7. If metaphor attribution is unclear, use cautious phrasing like "This passage describes..." or "Similarly..."
-8. Only state what the text explicitly says - avoid interpretation
-
-VERB-MATCHING RULE:
-9. Match your answer to the question's verb:
-   - If question asks "who APPEARS", answer about who appears (not who speaks)
-   - If question asks "who SPEAKS", answer about who speaks
-   - If question asks "who SENDS", answer about who sends
-   - Distinguish between appearing, speaking, going, sending, etc.
-
-CONTEXT PRIORITY RULE (for cross-testament clarity):
-10. When question asks about OT figures (Abraham, Moses, David, etc.):
-    - FIRST describe what the OT passages say (Genesis, Exodus, etc.)
-    - THEN, if NT passages are included, say "Later NT passages describe..." or "In the New Testament..."
-    - This helps users understand the original context vs later interpretation
+        """Get the system prompt for this instance's language."""
+        return self._system_prompt
 
-Be helpful but precise. Accuracy over creativity.""",
-            
-            "ta": """நீங்கள் ஒரு உதவிகரமான வேதாகம உதவியாளர். வழங்கப்பட்ட வேதாகம பத்திகளின் அடிப்படையில் மட்டுமே கேள்விகளுக்கு பதிலளிக்கவும்.
-
-விதிகள்:
-1. கீழே உள்ள வேதாகம பத்திகளிலிருந்து மட்டுமே தகவலைப் பயன்படுத்தவும்
-2. பத்திகளிலிருந்து வேதாகம மேற்கோள்களை (நூல் அதிகாரம்:வசனம்) குறிப்பிடவும்
-3. பதில்களை சுருக்கமாகவும் நேரடியாகவும் வைக்கவும்
-
-முக்கிய துல்லிய விதிகள்:
-4. உரையில் வெளிப்படையாகக் குறிப்பிடப்படாவிட்டால், ஒரு வசனம் மற்றொன்றை "குறிப்பிடுகிறது" என்று கூறாதீர்கள்
-5. ஒன்று மற்றொன்றை மேற்கோள் காட்டுவது போல் பழைய ஏற்பாடு மற்றும் புதிய ஏற்பாடு பத்திகளை இணைக்காதீர்கள்
-6. குறியீட்டு/உருவக கருத்துகளுக்கு: ஒவ்வொரு பத்தியும் என்ன சொல்கிறது என்பதை தனித்தனியாக விவரிக்கவும்
-7. துல்லியமாக இருங்கள் - படைப்பாற்றலை விட துல்லியம் முக்கியம்."""
-        }
-        return prompts.get(self.language, prompts["en"])
-    
-    def retrieve_context(self, query: str, top_k: int = None) -> List[Dict]:
+    def retrieve_context(self, query: str, top_k: int = None, query_embedding=None) -> List[Dict]:
         """Retrieve relevant Bible passages for the query."""
         if top_k is None:
             top_k = config.TOP_K_RESULTS
-        
-        results = self.vector_store.search(query, top_k=top_k)
+
+        results = self.vector_store.search(query, top_k=top_k, query_embedding=query_embedding)
         return results
     
     def format_context(self, results: List[Dict]) -> str:
         """Format retrieved results into context string."""
-        context_parts = []
-        
-        for i, result in enumerate(results, 1):
-            refs = ", ".join(result.get('references', []))
-            if not refs:
-                refs = f"{result.get('book', 'Unknown')} {result.get('chapter', '?')}"
-            
-            context_parts.append(f"[{i}] Reference: {refs}\nText: {result['text']}\n")
-        
-        return "\n".join(context_parts)
+        return "\n".join(
+            f"[{i}] Reference: {_result_refs(result)}\nText: {result['text']}\n"
+            for i, result in enumerate(results, 1)
+        )
     
-    def generate_response(self, query: str, context: str) -> str:
-        """Generate response using LLM with strict retrieval-only prompting."""
-        if not self.client:
-            # Fallback: return context-based response without LLM
-            return self._fallback_response(context)
-        
-        system_prompt = self.get_language_prompts()
-        
-        # Very strict user prompt emphasizing zero hallucination
+    def _build_user_prompt(self, query: str, context: str) -> str:
+        """Build the strict retrieval-only user prompt for the LLM."""
         if self.language == "ta":
-            user_prompt = f"""வேதாகம பத்திகள்:
+            return f"""வேதாகம பத்திகள்:
 {context}
 
 கேள்வி: {query}
 
 மேலே உள்ள பத்திகளின் அடிப்படையில் மட்டுமே பதிலளிக்கவும். பத்திகளில் இல்லாத எதையும் சேர்க்காதீர்கள்."""
-        else:
-            user_prompt = f"""Bible Passages:
+        return f"""Bible Passages:
 {context}
 
 Question: {query}
 
 Answer based ONLY on the passages above. Do not add anything that is not in the passages."""
-        
+
+    def generate_response(self, query: str, context: str) -> str:
+        """Generate response using LLM with strict retrieval-only prompting."""
+        if not self.client:
+            # Fallback: return context-based response without LLM
+            return self._fallback_response(context)
+
+        system_prompt = self.get_language_prompts()
+
+        # Very strict user prompt emphasizing zero hallucination
+        user_prompt = self._build_user_prompt(query, context)
+
         try:
             # Use OpenAI chat completion API - Optimized for SPEED
             response = self.client.chat.completions.create(
@@ -440,7 +525,40 @@ Answer based ONLY on the passages above. Do not add anything that is not in the
         except Exception as e:
             print(f"Error generating response: {e}")
             return self._fallback_response(context)
-    
+
+    def generate_response_stream(self, query: str, context: str):
+        """
+        Streaming variant of generate_response.
+        Yields answer text deltas as they arrive from the LLM so the UI can
+        render tokens immediately instead of waiting for the full answer.
+        """
+        if not self.client:
+            yield self._fallback_response(context)
+            return
+
+        system_prompt = self.get_language_prompts()
+        user_prompt = self._build_user_prompt(query, context)
+
+        try:
+            stream = self.client.chat.completions.create(
+                model=config.LLM_MODEL,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ],
+                temperature=config.TEMPERATURE,
+                max_tokens=getattr(config, 'MAX_TOKENS', 300),
+                stream=True
+            )
+            for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    yield delta
+
+        except Exception as e:
+            print(f"Error generating response: {e}")
+            yield self._fallback_response(context)
+
     def _fallback_response(self, context: str) -> str:
         """Fallback response when LLM is not available."""
         if self.language == "ta":
@@ -448,10 +566,16 @@ Answer based ONLY on the passages above. Do not add anything that is not in the
         else:
             return f"Retrieved Bible passages:\n\n{context}\n\nPlease read the answer from the passages above."
     
-    def query(self, question: str, top_k: int = None) -> Dict:
+    def _prepare_query(self, question: str, top_k: int = None, query_embedding=None):
         """
-        Main query method: retrieve context and generate response.
-        Returns response with sources.
+        Run the retrieval pipeline shared by query() and stream_query():
+        verse-pin lookup, thematic anchors, then semantic search with
+        disambiguation.
+
+        Returns (early_result, results, notes). early_result is a complete
+        response dict for refusal paths (verse not found, no passages) and
+        None otherwise; notes carries the verse-pin/thematic/disambiguation
+        annotations for the final answer.
         """
         verse_pin_note = None
         thematic_note = None
@@ -480,7 +604,7 @@ Answer based ONLY on the passages above. Do not add anything that is not in the
                     "sources": [],
                     "context": "",
                     "error": "verse_not_found"
-                }
+                }, [], {}
         
         # Step 0.5: Check for THEMATIC queries (e.g., "What promise did God make to Abraham in Genesis?")
         if not results:
@@ -494,7 +618,10 @@ Answer based ONLY on the passages above. Do not add anything that is not in the
         # Step 1: If no pinned/thematic results, use semantic search with disambiguation
         if not results:
             expanded_query, disambiguation_note = self.disambiguate_query(question)
-            results = self.retrieve_context(expanded_query, top_k=top_k)
+            # A precomputed embedding only matches the original question text
+            if expanded_query != question:
+                query_embedding = None
+            results = self.retrieve_context(expanded_query, top_k=top_k, query_embedding=query_embedding)
         else:
             disambiguation_note = None
         
@@ -504,42 +631,45 @@ Answer based ONLY on the passages above. Do not add anything that is not in the
                     "answer": "மன்னிக்கவும், உங்கள் கேள்விக்கு பொருத்தமான வேதாகம பத்திகளைக் கண்டுபிடிக்க முடியவில்லை. தயவுசெய்து உங்கள் கேள்வியை மீண்டும் உருவாக்கவும்.",
                     "sources": [],
                     "context": ""
-                }
+                }, [], {}
             else:
                 return {
                     "answer": "Sorry, I couldn't find relevant Bible passages for your question. Please try rephrasing your question.",
                     "sources": [],
                     "context": ""
-                }
-        
+                }, [], {}
+
+        notes = {
+            "verse_pin_note": verse_pin_note,
+            "thematic_note": thematic_note,
+            "disambiguation_note": disambiguation_note
+        }
+        return None, results, notes
+
+    def _finalize_result(self, answer: str, results: List[Dict], context: str, notes: Dict) -> Dict:
+        """Attach notes, coherence warning and sources to a generated answer."""
         # Step 3: Check retrieval coherence
         coherence_warning = self.check_retrieval_coherence(results)
-        
-        # Step 4: Format context
-        context = self.format_context(results)
-        
-        # Step 5: Generate response using ORIGINAL question (not expanded)
-        answer = self.generate_response(question, context)
-        
-        # Step 6: Add notes if applicable
-        if verse_pin_note:
-            answer = f"{verse_pin_note}\n\n{answer}"
-        
-        if thematic_note:
-            answer = f"{thematic_note}\n\n{answer}"
-        
-        if disambiguation_note:
-            answer = f"{answer}\n\n{disambiguation_note}"
-        
+
+        # Add notes if applicable
+        if notes.get("verse_pin_note"):
+            answer = f"{notes['verse_pin_note']}\n\n{answer}"
+
+        if notes.get("thematic_note"):
+            answer = f"{notes['thematic_note']}\n\n{answer}"
+
+        if notes.get("disambiguation_note"):
+            answer = f"{answer}\n\n{notes['disambiguation_note']}"
+
         if coherence_warning:
             answer = f"{answer}\n\n{coherence_warning}"
-        
-        # Extract sources
-        sources = []
-        for result in results:
-            sources.extend(result.get('references', []))
-        sources = list(set(sources))
-        
+
+        # Extract sources, deduplicated in retrieval-rank order so the UI
+        # lists the strongest citations first
+        sources = list(dict.fromkeys(
+            ref for result in results for ref in result.get('references', ())
+        ))
+
         return {
             "answer": answer,
             "sources": sources,
@@ -547,3 +677,87 @@ Answer based ONLY on the passages above. Do not add anything that is not in the
             "retrieved_chunks": results
         }
 
+    def batch_query(self, questions: List[str], top_k: int = None) -> List[List[Dict]]:
+        """
+        Retrieve passages for several questions at once: one batched
+        encoder forward and a single FAISS search over the stacked query
+        matrix, which FAISS parallelizes internally. Returns one result
+        list per question, in input order. Bypasses the verse-pin /
+        thematic / disambiguation steps, which are inherently per-query;
+        use query() when those matter.
+        """
+        if top_k is None:
+            top_k = config.TOP_K_RESULTS
+        return self.vector_store.search_batch(questions, top_k=top_k)
+
+    def retrieve_only(self, question: str, top_k: int = None, query_embedding=None):
+        """
+        Run just the retrieval pipeline, without generation.
+        Returns (early_result, results, notes) exactly as _prepare_query
+        does. Useful when one retrieval at a large top_k is shared across
+        several truncated arms (results[:k] of an L2 search is the top-k
+        result set).
+        """
+        return self._prepare_query(question, top_k=top_k, query_embedding=query_embedding)
+
+    def query_from_results(self, question: str, results: List[Dict], notes: Dict) -> Dict:
+        """Generate and finalize an answer from already-retrieved results."""
+        context = self.format_context(results)
+        answer = self.generate_response(question, context)
+        return self._finalize_result(answer, results, context, notes)
+
+    def query(self, question: str, top_k: int = None, query_embedding=None) -> Dict:
+        """
+        Main query method: retrieve context and generate response.
+        Accepts an optional precomputed embedding for the question (used by
+        the app's batched pill warm-up) to skip the encoder forward pass.
+        Repeated questions (normalized for case and whitespace) are served
+        from an in-process LRU. Returns response with sources.
+        """
+        cache_key = (' '.join(question.lower().split()), top_k)
+        cached = self._answer_cache.get(cache_key)
+        if cached is not None:
+            self._answer_cache.move_to_end(cache_key)
+            self.answer_cache_hits += 1
+            # Hand out a copy: the verifier layer mutates results in
+            # place (adds verification keys, swaps in refusal text on
+            # rejection), and that must never leak back into the cache.
+            return dict(cached)
+
+        early_result, results, notes = self._prepare_query(question, top_k=top_k, query_embedding=query_embedding)
+        if early_result:
+            return early_result
+
+        context = self.format_context(results)
+
+        # Generate response using ORIGINAL question (not expanded)
+        answer = self.generate_response(question, context)
+
+        response = self._finalize_result(answer, results, context, notes)
+        # Cache a copy for the same reason hits return one: the caller
+        # may mutate the dict it gets back.
+        self._answer_cache[cache_key] = dict(response)
+        if len(self._answer_cache) > ANSWER_CACHE_SIZE:
+            self._answer_cache.popitem(last=False)
+        return response
+
+    def stream_query(self, question: str, top_k: int = None, query_embedding=None):
+        """
+        Streaming variant of query(): yields answer text deltas as they
+        arrive, then returns the complete response dict (same shape as
+        query()) as the generator's return value.
+        """
+        early_result, results, notes = self._prepare_query(question, top_k=top_k, query_embedding=query_embedding)
+        if early_result:
+            yield early_result["answer"]
+            return early_result
+
+        context = self.format_context(results)
+
+        parts = []
+        for delta in self.generate_response_stream(question, context):
+            parts.append(delta)
+            yield delta
+
+        return self._finalize_result("".join(parts), results, context, notes)
+
@@ -5,10 +5,13 @@ This preloads the problematic modules before streamlit runs.
 import os
 import sys
 
-# Set environment variables before any imports
+# Set environment variables before any imports. The OMP/MKL clamps
+# exist only to dodge a macOS segfault; elsewhere they would cap encode
+# throughput, so keep threading untouched on other platforms.
 os.environ['TOKENIZERS_PARALLELISM'] = 'false'
-os.environ['OMP_NUM_THREADS'] = '1'
-os.environ['MKL_NUM_THREADS'] = '1'
+if sys.platform == 'darwin':
+    os.environ['OMP_NUM_THREADS'] = '1'
+    os.environ['MKL_NUM_THREADS'] = '1'
 
 # Preload the problematic modules
 print("Preloading modules...")
@@ -1,6 +1,7 @@
 """
 Verification script to check if the Bible RAG system is properly set up.
 """
+import importlib.util
 import os
 import sys
 import config
@@ -30,10 +31,11 @@ def check_setup():
     ]
     
     for package in required_packages:
-        try:
-            __import__(package.replace('-', '_'))
+        # find_spec only locates the module - unlike __import__ it never
+        # initializes it, so checking torch/faiss doesn't cost seconds
+        if importlib.util.find_spec(package.replace('-', '_')) is not None:
             print(f"   ✓ {package}")
-        except ImportError:
+        else:
             issues.append(f"Missing package: {package}")
             print(f"   ❌ {package} not installed")
     